@@ -0,0 +1,38 @@
+import sys
+import logging
+import argparse
+import importlib
+
+# Subcomando -> (módulo que o implementa, descrição). Cada módulo expõe add_arguments(parser) e run(args)
+# e não executa nada ao ser importado; o Pillow só é carregado quando uma imagem é processada
+SUBCOMMANDS = {
+    'organize-by-date': ('script_create_dir_in_date_of_files', 'Organiza fotos e vídeos em pastas ano/mês/dia pela data de captura.'),
+    'organize-docs': ('script_organization_documents', 'Organiza documentos em pastas ano/mês pela data de criação.'),
+    'flatten': ('script_moved_files_and_delete_dir', 'Move os arquivos de todas as subpastas para um único diretório e remove as pastas vazias.'),
+    'move-jsons': ('moved_jsons_script', 'Move os arquivos JSON de cada subpasta para uma pasta "<nome>_jsons".'),
+    'instagram': ('instagram_script', 'Gera versões das imagens no formato do Instagram.'),
+    'gradle-catalog': ('convert_dependencies_mvp', 'Processa arquivos Gradle e cria um arquivo TOML com dependências, plugins e bundles.'),
+}
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description='Scripts de automação: organização de arquivos, imagens e catálogo Gradle.')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    for command, (module_name, description) in SUBCOMMANDS.items():
+        module = importlib.import_module(module_name)
+        subparser = subparsers.add_parser(command, help=description, description=description)
+        module.add_arguments(subparser)
+        subparser.set_defaults(run=module.run)
+    return parser
+
+
+def main(argv=None):
+    # Pode ser chamado várias vezes no mesmo processo (ex.: um worker de longa duração): main(['flatten', ...]).
+    # A configuração do logging fica aqui, e não nos módulos, para não alterar quem só os importa
+    logging.basicConfig(level=logging.INFO)
+    args = build_parser().parse_args(argv)
+    return args.run(args)
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,168 @@
+import os
+import re
+import time
+import statistics
+import shutil
+import random
+import argparse
+import tempfile
+
+from convert_dependencies_mvp import GradleParser
+
+# Bloco android típico, para que os arquivos sintéticos tenham texto que não é dependência
+ANDROID_BLOCK = '''android {
+    namespace "com.example.module"
+    compileSdk 34
+    defaultConfig {
+        minSdk 24
+        targetSdk 34
+        testInstrumentationRunner "androidx.test.runner.AndroidJUnitRunner"
+    }
+    buildTypes {
+        release {
+            minifyEnabled true
+            proguardFiles getDefaultProguardFile('proguard-android-optimize.txt'), 'proguard-rules.pro'
+        }
+    }
+    compileOptions {
+        sourceCompatibility JavaVersion.VERSION_17
+        targetCompatibility JavaVersion.VERSION_17
+    }
+}
+'''
+
+
+def gerar_projeto_sintetico(project_directory, modules, dependencies_per_module, seed=42):
+    # Gera uma árvore multi-módulo com build.gradle e build.gradle.kts alternados
+    rng = random.Random(seed)
+    configurations = ['implementation', 'testImplementation', 'androidTestImplementation', 'kapt', 'debugImplementation']
+
+    for module_index in range(modules):
+        module_directory = os.path.join(project_directory, f'feature-{module_index // 50}', f'module-{module_index}')
+        os.makedirs(module_directory, exist_ok=True)
+        kotlin_dsl = module_index % 2 == 0
+        quote = '"' if kotlin_dsl else "'"
+
+        lines = []
+        if not kotlin_dsl:
+            lines.append("apply plugin: 'com.android:library'")
+        lines.append(ANDROID_BLOCK)
+        lines.append('dependencies {')
+        for _ in range(dependencies_per_module):
+            configuration = rng.choice(configurations)
+            library = rng.randrange(dependencies_per_module * 4)
+            coordinates = f'{quote}com.example.group{library % 20}:library-{library}:1.{library % 7}.0{quote}'
+            if kotlin_dsl or len(lines) % 2:
+                lines.append(f'    {configuration}({coordinates})')
+            else:
+                # Metade das dependências do Groovy na forma sem parênteses: implementation 'g:n:v'
+                lines.append(f'    {configuration} {coordinates}')
+        lines.append(f'    bundle {quote}com.example.bundle:bundle-{module_index % 10}:2.0{quote}')
+        lines.append('}')
+
+        file_name = 'build.gradle.kts' if kotlin_dsl else 'build.gradle'
+        with open(os.path.join(module_directory, file_name), 'w') as build_file:
+            build_file.write('\n'.join(lines) + '\n')
+
+
+def parse_legado(parser):
+    # Reproduz o parsing anterior: uma regex por configuração, recompilada para cada arquivo
+    # (com a mesma gramática do scanner atual, incluindo a forma do Groovy sem parênteses)
+    for root, dirs, files in os.walk(parser.project_directory):
+        for file_name in files:
+            if file_name in ('build.gradle', 'build.gradle.kts'):
+                parser.gradle_files.append(os.path.join(root, file_name))
+
+    for gradle_file in parser.gradle_files:
+        with open(gradle_file, 'r') as file:
+            content = file.read()
+
+            for configuration in parser.dependency_configurations:
+                pattern = re.compile(f'{configuration}(?:\\(|[ \\t]+)["\']([^:"\']+):([^:"\']+):([^:"\']+)')
+                for group, name, version in pattern.findall(content):
+                    key = name.lower()
+                    if key not in parser.gradle_dependencies:
+                        parser.gradle_dependencies[key] = {"group": group, "name": name, "version": version}
+
+            for plugin_group, plugin_name in parser.plugin_pattern.findall(content):
+                parser.gradle_plugins[f'{plugin_group}:{plugin_name}'] = {"group": plugin_group, "name": plugin_name}
+
+            for bundle_group, bundle_name, bundle_version in parser.bundle_pattern.findall(content):
+                parser.gradle_bundles[f'{bundle_group}:{bundle_name}'] = {
+                    "group": bundle_group,
+                    "name": bundle_name,
+                    "version": bundle_version,
+                }
+
+
+def escanear_legado(parser, content):
+    # Apenas a fase de regex do parsing anterior: 8 varreduras por configuração + plugins + bundles
+    matches = []
+    for configuration in parser.dependency_configurations:
+        pattern = re.compile(f'{configuration}(?:\\(|[ \\t]+)["\']([^:"\']+):([^:"\']+):([^:"\']+)')
+        matches.extend(pattern.findall(content))
+    return matches, parser.plugin_pattern.findall(content), parser.bundle_pattern.findall(content)
+
+
+def medir_escaneamento(contents, scan_function, repeat):
+    # Mede só o custo de regex, com os conteúdos já em memória; retorna a mediana das repetições
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for content in contents:
+            scan_function(content)
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+def medir(project_directory, parse_function, repeat):
+    # Retorna a mediana dos tempos entre as repetições e o último parser usado
+    times = []
+    parser = None
+    for _ in range(repeat):
+        parser = GradleParser(project_directory, replace=False)
+        start = time.perf_counter()
+        parse_function(parser)
+        times.append(time.perf_counter() - start)
+    return statistics.median(times), parser
+
+
+def main():
+    argument_parser = argparse.ArgumentParser(description='Compara o parsing legado do GradleParser (uma regex por configuração, recompilada por arquivo) com o scanner de passada única.')
+    argument_parser.add_argument('--modules', type=int, default=1400, help='Quantidade de módulos sintéticos')
+    argument_parser.add_argument('--dependencies', type=int, default=20, help='Dependências por módulo')
+    argument_parser.add_argument('--repeat', type=int, default=7, help='Repetições por abordagem (vale a mediana)')
+    args = argument_parser.parse_args()
+
+    temp_dir = tempfile.mkdtemp()
+    try:
+        gerar_projeto_sintetico(temp_dir, args.modules, args.dependencies)
+
+        legacy_time, legacy_parser = medir(temp_dir, parse_legado, args.repeat)
+        single_pass_time, single_pass_parser = medir(temp_dir, GradleParser.parse, args.repeat)
+
+        # Garante que as duas abordagens produzem exatamente os mesmos dicionários (incluindo a ordem)
+        for attribute in ('gradle_dependencies', 'gradle_plugins', 'gradle_bundles'):
+            legacy_items = list(getattr(legacy_parser, attribute).items())
+            single_pass_items = list(getattr(single_pass_parser, attribute).items())
+            if legacy_items != single_pass_items:
+                raise SystemExit(f'Resultados divergentes em {attribute}.')
+
+        contents = []
+        for gradle_file in single_pass_parser.gradle_files:
+            with open(gradle_file, 'r') as file:
+                contents.append(file.read())
+        legacy_scan_time = medir_escaneamento(contents, lambda content: escanear_legado(legacy_parser, content), args.repeat)
+        single_pass_scan_time = medir_escaneamento(contents, single_pass_parser.scan_content, args.repeat)
+
+        print(f'Arquivos: {len(single_pass_parser.gradle_files)}')
+        print(f'parse() legado:           {legacy_time:.3f}s')
+        print(f'parse() passada única:    {single_pass_time:.3f}s ({legacy_time / single_pass_time:.2f}x)')
+        print(f'Regex legado:             {legacy_scan_time:.3f}s')
+        print(f'Regex passada única:      {single_pass_scan_time:.3f}s ({legacy_scan_time / single_pass_scan_time:.2f}x)')
+    finally:
+        shutil.rmtree(temp_dir)
+
+
+if __name__ == '__main__':
+    main()
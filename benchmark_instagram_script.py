@@ -0,0 +1,67 @@
+import os
+import time
+import shutil
+import argparse
+import resource
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+from PIL import Image
+
+import instagram_script
+
+
+def gerar_fotos_sinteticas(directory, count, width, height):
+    # Gera JPEGs com ruído (difíceis de comprimir, como fotos reais) no tamanho de uma câmera
+    noise = Image.merge('RGB', [Image.effect_noise((width, height), sigma) for sigma in (40, 60, 80)])
+    image_paths = []
+    for index in range(count):
+        image_path = os.path.join(directory, f'foto-{index}.jpg')
+        noise.rotate(index * 90, expand=False).save(image_path, quality=92)
+        image_paths.append(image_path)
+    return image_paths
+
+
+def process_image_legado(image_path):
+    # Reproduz o caminho anterior: verify() em uma abertura e decodificação em resolução cheia em outra
+    with Image.open(image_path) as image:
+        image.verify()
+
+    image = Image.open(image_path)
+    image = image.resize((1080, 1080))
+    image.save(instagram_script.output_path_for(image_path))
+
+
+def medir_em_processo_novo(process_function, image_paths):
+    # Roda em um processo novo para que o pico de memória (ru_maxrss) seja só desta abordagem
+    baseline_rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    for image_path in image_paths:
+        process_function(image_path)
+    elapsed = time.perf_counter() - start
+    peak_rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return elapsed, baseline_rss_kb, peak_rss_kb
+
+
+def main():
+    argument_parser = argparse.ArgumentParser(description='Compara a decodificação em resolução cheia com o draft() do instagram_script.')
+    argument_parser.add_argument('--images', type=int, default=8, help='Quantidade de fotos sintéticas')
+    argument_parser.add_argument('--width', type=int, default=6000, help='Largura das fotos (6000x4000 = 24 MP)')
+    argument_parser.add_argument('--height', type=int, default=4000, help='Altura das fotos')
+    args = argument_parser.parse_args()
+
+    temp_dir = tempfile.mkdtemp()
+    try:
+        image_paths = gerar_fotos_sinteticas(temp_dir, args.images, args.width, args.height)
+
+        for label, process_function in (('Legado', process_image_legado), ('Draft', instagram_script.process_image)):
+            with ProcessPoolExecutor(max_workers=1) as executor:
+                elapsed, baseline_rss_kb, peak_rss_kb = executor.submit(medir_em_processo_novo, process_function, image_paths).result()
+            print(f'{label}: {elapsed / len(image_paths) * 1000:.1f} ms/imagem, '
+                  f'pico de RSS +{(peak_rss_kb - baseline_rss_kb) / 1024:.1f} MB (total {peak_rss_kb / 1024:.1f} MB)')
+    finally:
+        shutil.rmtree(temp_dir)
+
+
+if __name__ == '__main__':
+    main()
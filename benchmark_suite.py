@@ -0,0 +1,323 @@
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import zipfile
+import argparse
+import platform
+import resource
+import tempfile
+import subprocess
+from datetime import datetime, timedelta
+from concurrent.futures import ProcessPoolExecutor
+
+from benchmark_gradle_parser import gerar_projeto_sintetico
+from convert_dependencies_mvp import GradleParser
+from file_mover import normalize_extensions
+from moved_jsons_script import move_json_files
+from script_create_dir_in_date_of_files import organizar_arquivos
+import instagram_script
+import script_moved_files_and_delete_dir
+import script_organization_documents
+
+# tmpfs: mede CPU e syscalls dos scripts, não a velocidade do disco da máquina
+DEFAULT_WORK_DIRECTORY = '/dev/shm' if os.path.isdir('/dev/shm') else None
+
+# Data inicial das fotos sintéticas; cada foto recebe um deslocamento aleatório a partir dela
+CORPUS_START_DATE = datetime(2018, 1, 1)
+
+DOCUMENT_EXTENSIONS = ['.html', '.json', '.png', '.gif', '.bmp', '.webp']
+
+
+def contar_arquivos(directory, predicate=lambda file_name: True):
+    # (quantidade, bytes) dos arquivos que satisfazem o predicado, em toda a árvore
+    files = 0
+    total_bytes = 0
+    for root, dirs, file_names in os.walk(directory):
+        for file_name in file_names:
+            if predicate(file_name):
+                files += 1
+                total_bytes += os.path.getsize(os.path.join(root, file_name))
+    return files, total_bytes
+
+
+def data_aleatoria(rng):
+    return CORPUS_START_DATE + timedelta(seconds=rng.randrange(5 * 365 * 24 * 3600))
+
+
+def gerar_fotos_com_exif(directory, count, width, height, seed=42):
+    # JPEGs com ruído (difíceis de comprimir, como fotos reais) e DateTimeOriginal real no cabeçalho EXIF
+    from PIL import Image
+
+    rng = random.Random(seed)
+    os.makedirs(directory, exist_ok=True)
+    noise = Image.merge('RGB', [Image.effect_noise((width, height), sigma) for sigma in (40, 60, 80)])
+    for index in range(count):
+        capture_date = data_aleatoria(rng).strftime('%Y:%m:%d %H:%M:%S')
+        exif = Image.Exif()
+        exif[306] = capture_date  # DateTime
+        exif.get_ifd(0x8769)[36867] = capture_date  # DateTimeOriginal
+        noise.rotate(index * 90).save(os.path.join(directory, f'IMG_{index:05d}.jpg'), quality=90, exif=exif)
+
+
+def gerar_documentos(directory, count, seed=42):
+    # Arquivos planos com extensões e tamanhos variados. organizar_documentos agrupa pelo ctime, que no Linux
+    # não pode ser alterado (os.utime só muda atime/mtime): todos os documentos vão para a pasta do ano/mês corrente,
+    # então este cenário mede a varredura e os renames, não a criação de várias pastas de destino
+    rng = random.Random(seed)
+    os.makedirs(directory, exist_ok=True)
+    for index in range(count):
+        file_path = os.path.join(directory, f'documento-{index:05d}{rng.choice(DOCUMENT_EXTENSIONS)}')
+        with open(file_path, 'wb') as file:
+            file.write(rng.randbytes(rng.randrange(4 * 1024, 64 * 1024)))
+
+
+def gerar_jsons_aninhados(directory, count, depth=3, fanout=4, seed=42):
+    # Pastas aninhadas (fanout^depth folhas) com JSONs e alguns arquivos que não são JSON no meio
+    rng = random.Random(seed)
+    leaf_directories = ['']
+    for _ in range(depth):
+        leaf_directories = [os.path.join(parent, f'pasta-{child}') for parent in leaf_directories for child in range(fanout)]
+    for leaf_directory in leaf_directories:
+        os.makedirs(os.path.join(directory, leaf_directory), exist_ok=True)
+
+    for index in range(count):
+        leaf_directory = os.path.join(directory, rng.choice(leaf_directories))
+        record = {'id': index, 'tags': [rng.randrange(1000) for _ in range(rng.randrange(1, 20))], 'nome': f'registro-{index}'}
+        with open(os.path.join(leaf_directory, f'registro-{index:05d}.json'), 'w') as file:
+            json.dump(record, file)
+        if index % 10 == 0:
+            with open(os.path.join(leaf_directory, f'nota-{index:05d}.txt'), 'w') as file:
+                file.write('não é JSON\n')
+
+
+def gerar_backup_com_zips(directory, loose_files, archives, members_per_archive, seed=42):
+    # Árvore de backup de celular: arquivos soltos em subpastas (com nomes repetidos e alguns duplicados)
+    # e arquivos .zip com membros que passam e que não passam pelo filtro de extensão
+    rng = random.Random(seed)
+    os.makedirs(directory, exist_ok=True)
+    previous_content = b''
+    for index in range(loose_files):
+        subdirectory = os.path.join(directory, f'DCIM-{index % 16}', f'{index % 5}')
+        os.makedirs(subdirectory, exist_ok=True)
+        if index % 20 == 0 and previous_content:
+            content = previous_content  # duplicado byte a byte
+        else:
+            content = rng.randbytes(rng.randrange(16 * 1024, 256 * 1024))
+        with open(os.path.join(subdirectory, f'IMG_{index % 400:04d}.jpg'), 'wb') as file:
+            file.write(content)
+        previous_content = content
+
+    for archive_index in range(archives):
+        with zipfile.ZipFile(os.path.join(directory, f'export-{archive_index}.zip'), 'w', zipfile.ZIP_STORED) as archive:
+            for member_index in range(members_per_archive):
+                extension = '.jpg' if member_index % 4 else '.txt'
+                archive.writestr(f'Fotos/{archive_index}/foto-{member_index}{extension}', rng.randbytes(rng.randrange(16 * 1024, 128 * 1024)))
+
+
+def executar_gradle_parse(project_directory):
+    start = time.perf_counter()
+    GradleParser(project_directory, replace=False).parse()
+    return time.perf_counter() - start
+
+
+def executar_gradle_save_to_toml(project_directory):
+    gradle_parser = GradleParser(project_directory, replace=False)
+    gradle_parser.parse()
+    start = time.perf_counter()
+    gradle_parser.save_to_toml(os.path.join(project_directory, 'libs.versions.toml'))
+    return time.perf_counter() - start
+
+
+def executar_gradle_replace_dependencies(project_directory):
+    gradle_parser = GradleParser(project_directory, replace=True)
+    gradle_parser.parse()
+    start = time.perf_counter()
+    gradle_parser.replace_dependencies()
+    return time.perf_counter() - start
+
+
+def executar_organizar_arquivos(corpus_directory):
+    start = time.perf_counter()
+    organizar_arquivos(
+        os.path.join(corpus_directory, 'fotos'),
+        os.path.join(corpus_directory, 'organizadas'),
+        normalize_extensions(['.jpg']),
+    )
+    return time.perf_counter() - start
+
+
+def executar_organizar_documentos(corpus_directory):
+    start = time.perf_counter()
+    script_organization_documents.organizar_documentos(
+        os.path.join(corpus_directory, 'documentos'),
+        os.path.join(corpus_directory, 'organizados'),
+        normalize_extensions(script_organization_documents.DEFAULT_ALLOWED_EXTENSIONS),
+    )
+    return time.perf_counter() - start
+
+
+def executar_move_json_files(corpus_directory):
+    start = time.perf_counter()
+    move_json_files(corpus_directory)
+    return time.perf_counter() - start
+
+
+def executar_flatten(corpus_directory):
+    start = time.perf_counter()
+    script_moved_files_and_delete_dir.mover_arquivos_e_remover_pastas(
+        os.path.join(corpus_directory, 'backup'),
+        os.path.join(corpus_directory, 'destino'),
+        normalize_extensions(script_moved_files_and_delete_dir.DEFAULT_ALLOWED_EXTENSIONS),
+    )
+    return time.perf_counter() - start
+
+
+def executar_process_image(corpus_directory):
+    # Uma imagem por vez no mesmo processo, para que o pico de RSS seja o de uma única decodificação
+    image_paths = instagram_script.find_images(os.path.join(corpus_directory, 'fotos'))
+    start = time.perf_counter()
+    for image_path in image_paths:
+        instagram_script.process_image(image_path)
+    return time.perf_counter() - start
+
+
+def preparar_gradle(work_directory, args):
+    project_directory = os.path.join(work_directory, 'projeto')
+    gerar_projeto_sintetico(project_directory, args.modules, args.dependencies, args.seed)
+    return project_directory, contar_arquivos(project_directory, lambda file_name: file_name in ('build.gradle', 'build.gradle.kts'))
+
+
+def preparar_fotos(work_directory, args):
+    gerar_fotos_com_exif(os.path.join(work_directory, 'fotos'), args.photos, args.photo_width, args.photo_height, args.seed)
+    return work_directory, contar_arquivos(work_directory)
+
+
+def preparar_documentos(work_directory, args):
+    gerar_documentos(os.path.join(work_directory, 'documentos'), args.documents, args.seed)
+    return work_directory, contar_arquivos(work_directory)
+
+
+def preparar_jsons(work_directory, args):
+    gerar_jsons_aninhados(work_directory, args.json_files, seed=args.seed)
+    return work_directory, contar_arquivos(work_directory, lambda file_name: file_name.endswith('.json'))
+
+
+def preparar_backup(work_directory, args):
+    gerar_backup_com_zips(os.path.join(work_directory, 'backup'), args.loose_files, args.archives, args.archive_members, args.seed)
+    return work_directory, contar_arquivos(work_directory)
+
+
+# Nome -> (gera o corpus no processo principal, função medida em um processo novo)
+BENCHMARKS = {
+    'gradle_parse': (preparar_gradle, executar_gradle_parse),
+    'gradle_save_to_toml': (preparar_gradle, executar_gradle_save_to_toml),
+    'gradle_replace_dependencies': (preparar_gradle, executar_gradle_replace_dependencies),
+    'organizar_arquivos': (preparar_fotos, executar_organizar_arquivos),
+    'organizar_documentos': (preparar_documentos, executar_organizar_documentos),
+    'move_json_files': (preparar_jsons, executar_move_json_files),
+    'flatten': (preparar_backup, executar_flatten),
+    'process_image': (preparar_fotos, executar_process_image),
+}
+
+
+def medir_em_processo_novo(run_function, corpus_directory):
+    # Roda em um processo novo para que o pico de memória (ru_maxrss) seja só desta medição.
+    # A saída dos scripts (progresso, resumos) é descartada para não misturar com o relatório
+    devnull = os.open(os.devnull, os.O_WRONLY)
+    os.dup2(devnull, sys.stdout.fileno())
+    baseline_rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    elapsed = run_function(corpus_directory)
+    peak_rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return elapsed, baseline_rss_kb, peak_rss_kb
+
+
+def executar_benchmark(name, args):
+    prepare_function, run_function = BENCHMARKS[name]
+    times = []
+    peak_rss_kb = 0
+    peak_rss_delta_kb = 0
+    for _ in range(args.repeat):
+        # Os scripts movem ou reescrevem os arquivos, então cada repetição recebe um corpus novo (mesma semente)
+        work_directory = tempfile.mkdtemp(prefix=f'bench-{name}-', dir=args.work_dir)
+        try:
+            corpus_directory, (files, total_bytes) = prepare_function(work_directory, args)
+            sys.stdout.flush()
+            with ProcessPoolExecutor(max_workers=1) as executor:
+                elapsed, baseline_kb, peak_kb = executor.submit(medir_em_processo_novo, run_function, corpus_directory).result()
+        finally:
+            shutil.rmtree(work_directory)
+        times.append(elapsed)
+        peak_rss_kb = max(peak_rss_kb, peak_kb)
+        peak_rss_delta_kb = max(peak_rss_delta_kb, peak_kb - baseline_kb)
+
+    best_time = min(times)
+    return {
+        'name': name,
+        'files': files,
+        'bytes': total_bytes,
+        'best_seconds': best_time,
+        'times_seconds': times,
+        'files_per_second': files / best_time if best_time > 0 else 0.0,
+        'mb_per_second': total_bytes / (1024 * 1024) / best_time if best_time > 0 else 0.0,
+        'peak_rss_mb': peak_rss_kb / 1024,
+        'peak_rss_delta_mb': peak_rss_delta_kb / 1024,
+    }
+
+
+def commit_atual():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', 'HEAD'],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    argument_parser = argparse.ArgumentParser(description='Mede a vazão dos scripts em corpora sintéticos reproduzíveis e grava os resultados em JSON.')
+    argument_parser.add_argument('--output', type=str, default='benchmark-results.json', help='Arquivo JSON com os resultados')
+    argument_parser.add_argument('--only', action='append', choices=sorted(BENCHMARKS), help='Roda só este benchmark (pode repetir)')
+    argument_parser.add_argument('--work-dir', type=str, default=DEFAULT_WORK_DIRECTORY, help='Onde gerar os corpora (padrão: /dev/shm, um tmpfs)')
+    argument_parser.add_argument('--repeat', type=int, default=3, help='Repetições por benchmark (vale o melhor tempo)')
+    argument_parser.add_argument('--seed', type=int, default=42, help='Semente dos corpora')
+    argument_parser.add_argument('--modules', type=int, default=400, help='Módulos do projeto Gradle sintético')
+    argument_parser.add_argument('--dependencies', type=int, default=20, help='Dependências por módulo Gradle')
+    argument_parser.add_argument('--photos', type=int, default=24, help='Fotos com EXIF')
+    argument_parser.add_argument('--photo-width', type=int, default=4000, help='Largura das fotos')
+    argument_parser.add_argument('--photo-height', type=int, default=3000, help='Altura das fotos')
+    argument_parser.add_argument('--documents', type=int, default=2000, help='Documentos para organizar por data')
+    argument_parser.add_argument('--json-files', type=int, default=2000, help='JSONs nas pastas aninhadas')
+    argument_parser.add_argument('--loose-files', type=int, default=2000, help='Arquivos soltos no backup do flatten')
+    argument_parser.add_argument('--archives', type=int, default=8, help='Arquivos .zip no backup do flatten')
+    argument_parser.add_argument('--archive-members', type=int, default=100, help='Membros por arquivo .zip')
+    args = argument_parser.parse_args()
+
+    results = []
+    for name in args.only or BENCHMARKS:
+        result = executar_benchmark(name, args)
+        results.append(result)
+        print(f"{name:<28} {result['files']:>6} arquivos  {result['best_seconds']:8.3f}s  "
+              f"{result['files_per_second']:10.1f} arquivos/s  {result['mb_per_second']:8.1f} MB/s  "
+              f"pico de RSS {result['peak_rss_mb']:.1f} MB (+{result['peak_rss_delta_mb']:.1f} MB)")
+
+    report = {
+        'commit': commit_atual(),
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'work_dir': args.work_dir or tempfile.gettempdir(),
+        'parameters': {key: value for key, value in vars(args).items() if key not in ('output', 'only', 'work_dir')},
+        'results': results,
+    }
+    with open(args.output, 'w') as output_file:
+        json.dump(report, output_file, indent=2)
+    print(f"Resultados gravados em '{args.output}'.")
+
+
+if __name__ == '__main__':
+    main()
@@ -4,24 +4,153 @@ import argparse
 import unittest
 import tempfile
 import shutil
+import io
+import json
+import hashlib
+import time
+import fnmatch
 import logging
+from contextlib import contextmanager, nullcontext
+from unittest import mock
+from concurrent.futures import ProcessPoolExecutor
 
 # Configuração de logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Versão do formato do cache de parsing; incremente ao mudar a estrutura gravada
+PARSE_CACHE_VERSION = 1
+
+# Diretórios que nunca contêm um build.gradle de módulo e que a descoberta não percorre
+DEFAULT_IGNORED_DIRECTORIES = frozenset({
+    'build',
+    '.gradle',
+    '.git',
+    '.idea',
+    '.cxx',
+    '.externalNativeBuild',
+    'node_modules',
+})
+
+GRADLE_BUILD_FILES = ('build.gradle', 'build.gradle.kts')
+GRADLE_SETTINGS_FILES = ('settings.gradle', 'settings.gradle.kts')
+
+# Quantidade de arquivos enviada de uma vez para cada processo no modo --jobs
+PARSE_CHUNKSIZE = 16
+
+class GitIgnore:
+    # Subconjunto das regras do .gitignore: comentários, negação (!), padrões só de diretório (/ no final)
+    # e padrões ancorados (com / no início ou no meio); os demais casam com o nome em qualquer nível
+    def __init__(self, base_directory, lines):
+        self.base_directory = base_directory
+        self.rules = []
+        for line in lines:
+            line = line.rstrip('\n').rstrip()
+            if not line or line.startswith('#'):
+                continue
+
+            negated = line.startswith('!')
+            if negated:
+                line = line[1:]
+            directory_only = line.endswith('/')
+            line = line.rstrip('/')
+            anchored = '/' in line
+            self.rules.append((line.lstrip('/'), negated, directory_only, anchored))
+
+    @classmethod
+    def from_directory(cls, directory):
+        try:
+            with open(os.path.join(directory, '.gitignore'), 'r') as gitignore_file:
+                return cls(directory, gitignore_file.readlines())
+        except OSError:
+            return None
+
+    def match(self, path, is_directory):
+        # Retorna True (ignorado), False (re-incluído por negação) ou None (nenhuma regra casou)
+        relative_path = os.path.relpath(path, self.base_directory).replace(os.sep, '/')
+        name = relative_path.rsplit('/', 1)[-1]
+        result = None
+        for pattern, negated, directory_only, anchored in self.rules:
+            if directory_only and not is_directory:
+                continue
+            candidate = relative_path if anchored else name
+            if fnmatch.fnmatchcase(candidate, pattern):
+                result = not negated
+        return result
+
+class ParseProfiler:
+    # Acumula o tempo de cada fase e as estatísticas por arquivo do GradleParser.
+    # Os tempos são exclusivos: uma fase aberta dentro de outra (a descoberta, consumida sob demanda
+    # durante o parsing) é descontada da fase externa, para que a soma das fases não conte nada duas vezes
+    def __init__(self):
+        self.phases = {}
+        self.files = []
+        self._nested_times = []
+
+    @contextmanager
+    def phase(self, name):
+        self._nested_times.append(0.0)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            nested_time = self._nested_times.pop()
+            if self._nested_times:
+                self._nested_times[-1] += elapsed
+            self.phases[name] = self.phases.get(name, 0.0) + elapsed - nested_time
+
+    def record_file(self, file_stats):
+        self.files.append(file_stats)
+
+    def report(self):
+        return {
+            'phases': self.phases,
+            'totals': {
+                'files': len(self.files),
+                'bytes_read': sum(file_stats['bytes_read'] for file_stats in self.files),
+                'matches': sum(file_stats['matches'] for file_stats in self.files),
+                'read_time': sum(file_stats['read_time'] for file_stats in self.files),
+                'match_time': sum(file_stats['match_time'] for file_stats in self.files),
+            },
+            'files': self.files,
+        }
+
+    def save(self, report_path):
+        with open(report_path, 'w') as report_file:
+            json.dump(self.report(), report_file, indent=2)
+        logger.info(f"Saved profile report to {report_path}.")
+
+    def log_slowest_files(self, top):
+        for phase_name, elapsed in self.phases.items():
+            logger.info(f"Phase {phase_name}: {elapsed:.3f}s")
+
+        slowest_files = sorted(self.files, key=lambda file_stats: file_stats['read_time'] + file_stats['match_time'], reverse=True)
+        for file_stats in slowest_files[:top]:
+            parse_time = file_stats['read_time'] + file_stats['match_time']
+            logger.info(f"{parse_time * 1000:.2f}ms {file_stats['bytes_read']}B {file_stats['matches']} matches {file_stats['path']}")
+
 class GradleParser:
-    def __init__(self, project_directory, replace):
+    def __init__(self, project_directory, replace, jobs=1, cache_path=None, profiler=None,
+                 ignored_directories=DEFAULT_IGNORED_DIRECTORIES, use_gitignore=True, follow_settings=False):
         self.gradle_dependencies = {}
         self.gradle_plugins = {}
         self.gradle_bundles = {}
         self.project_directory = project_directory or "."
         self.replace = replace
+        self.jobs = jobs
+        self.cache_path = cache_path
+        self.profiler = profiler
+        self.ignored_directories = set(ignored_directories)
+        self.use_gitignore = use_gitignore
+        self.follow_settings = follow_settings
 
         # Expressões regulares
         self.dependency_pattern = re.compile(r'(\w+)\(["\']([^:"\']+):([^:"\']+):([^:"\']+)')
         self.plugin_pattern = re.compile(r'apply[ \t]+plugin:[ \t]+["\']([^:"\']+):([^:"\']+)["\']')
         self.bundle_pattern = re.compile(r'bundle[ \t]+["\']([^:"\']+):([^:"\']+):([^:"\']+)')
+        # Um include pode continuar nas linhas seguintes: entre parênteses, include(\n":app",\n":lib"\n),
+        # ou no Groovy, com cada linha terminando em vírgula, include ':app',\n':lib'
+        self.include_pattern = re.compile(r'^[ \t]*include\b[ \t]*(\([^)]*\)|(?:[^\n]*,[ \t]*\n)*[^\n]*)', re.MULTILINE)
         self.gradle_files = []
 
         # Configurações de dependência, plugin e bundle permitidas
@@ -36,105 +165,486 @@ class GradleParser:
             'testAnnotationProcessor',
         ]
 
+        # Scanner único: uma alternância pré-compilada que encontra configurações, plugins e bundles em uma só passada
+        self.scanner_pattern = self._build_scanner_pattern()
+
+    def _build_scanner_pattern(self):
+        # As configurações vão da mais longa para a mais curta, para que "kaptTest" não seja lido como "kapt".
+        # Aceita a chamada com parênteses, implementation("g:n:v"), e a forma do Groovy sem parênteses, implementation 'g:n:v'.
+        # O lookahead com as letras iniciais de cada alternativa deixa o motor descartar rápido as posições que não interessam
+        configurations = sorted(self.dependency_configurations, key=len, reverse=True)
+        first_letters = ''.join(sorted({configuration[0] for configuration in configurations} | {'a', 'b'}))
+        configuration_alternatives = '|'.join(re.escape(configuration) for configuration in configurations)
+        return re.compile(
+            f'(?=[{re.escape(first_letters)}])(?:'
+            f'(?P<configuration>{configuration_alternatives})(?:\\(|[ \t]+)["\']([^:"\']+):([^:"\']+):([^:"\']+)'
+            r'|apply[ \t]+plugin:[ \t]+["\'](?P<plugin>[^:"\']+):([^:"\']+)["\']'
+            r'|bundle[ \t]+["\'](?P<bundle>[^:"\']+):([^:"\']+):([^:"\']+))'
+        )
+
+    def scan_content(self, content):
+        # Devolve as dependências (agrupadas na ordem de dependency_configurations), plugins e bundles do conteúdo,
+        # com uma única varredura do scanner
+        dependencies_by_configuration = {configuration: [] for configuration in self.dependency_configurations}
+        plugins = []
+        bundles = []
+        for (configuration, group, name, version, plugin_group, plugin_name,
+             bundle_group, bundle_name, bundle_version) in self.scanner_pattern.findall(content):
+            if configuration:
+                dependencies_by_configuration[configuration].append((group, name, version))
+            elif plugin_group:
+                plugins.append((plugin_group, plugin_name))
+            else:
+                bundles.append((bundle_group, bundle_name, bundle_version))
+        dependencies = [
+            dependency
+            for configuration_dependencies in dependencies_by_configuration.values()
+            for dependency in configuration_dependencies
+        ]
+        return dependencies, plugins, bundles
+
     def parse(self):
         try:
-            # Percorre recursivamente o diretório do projeto e faz o parsing dos arquivos Gradle
-            for root, dirs, files in os.walk(self.project_directory):
-                for file_name in files:
-                    # Verifique se o arquivo é um build.gradle ou build.gradle.kts
-                    if file_name in ('build.gradle', 'build.gradle.kts'):
-                        file_path = os.path.join(root, file_name)
-                        self.gradle_files.append(file_path)
-
-            # Abre cada arquivo Gradle, encontra as dependências, plugins e bundles e adiciona-os às listas correspondentes
-            for gradle_file in self.gradle_files:
-                with open(gradle_file, 'r') as file:
-                    content = file.read()
+            # Descobre os arquivos Gradle sob demanda e faz o parsing de cada um conforme são encontrados
+            with self._phase('parse'):
+                gradle_files = self._track_gradle_files(self.discover_gradle_files())
+                if self.cache_path:
+                    file_results = self._parse_files_with_cache(gradle_files)
+                else:
+                    file_results = self._parse_files(gradle_files)
 
-                    # Encontra dependências
-                    for configuration in self.dependency_configurations:
-                        pattern = re.compile(f'{configuration}\(["\']([^:"\']+):([^:"\']+):([^:"\']+)')
-                        matches = pattern.findall(content)
-                        for match in matches:
-                            group, name, version = match
-                            key = name.lower()  # Use o nome como chave única
-                            if key not in self.gradle_dependencies:
-                                self.gradle_dependencies[key] = {
-                                    "group": group,
-                                    "name": name,
-                                    "version": version,
-                                }
-
-                    # Encontra plugins
-                    plugin_matches = self.plugin_pattern.findall(content)
-                    for match in plugin_matches:
-                        plugin_group, plugin_name = match
-                        plugin_key = f'{plugin_group}:{plugin_name}'
-                        self.gradle_plugins[plugin_key] = {
-                            "group": plugin_group,
-                            "name": plugin_name,
-                        }
-
-                    # Encontra bundles
-                    bundle_matches = self.bundle_pattern.findall(content)
-                    for match in bundle_matches:
-                        bundle_group, bundle_name, bundle_version = match
-                        bundle_key = f'{bundle_group}:{bundle_name}'
-                        self.gradle_bundles[bundle_key] = {
-                            "group": bundle_group,
-                            "name": bundle_name,
-                            "version": bundle_version,
-                        }
+                # Abre cada arquivo Gradle, encontra as dependências, plugins e bundles e adiciona-os às listas correspondentes
+                for dependencies, plugins, bundles in file_results:
+                    self.merge_file_result(dependencies, plugins, bundles)
 
             logger.info("Parsing completed successfully.")
         except Exception as e:
             logger.error(f"Error during parsing: {str(e)}")
 
+    def _track_gradle_files(self, gradle_files):
+        # Mantém self.gradle_files atualizado (usado por replace_dependencies) sem montar a lista antes do parsing
+        for gradle_file in gradle_files:
+            self.gradle_files.append(gradle_file)
+            yield gradle_file
+
+    def discover_gradle_files(self):
+        # Gera os caminhos dos build.gradle(.kts) na mesma ordem do os.walk, podando diretórios ignorados
+        if self.follow_settings:
+            module_directories = self._settings_module_directories()
+            if module_directories is not None:
+                yield from self._module_build_files(module_directories)
+                return
+
+        pending_directories = [(self.project_directory, [])]
+        while pending_directories:
+            directory, gitignores = pending_directories.pop()
+            subdirectories = []
+            build_files = []
+
+            with self._phase('discovery'):
+                try:
+                    with os.scandir(directory) as iterator:
+                        entries = list(iterator)
+                except OSError as e:
+                    logger.warning(f"Skipping {directory}: {str(e)}")
+                    continue
+
+                # O .gitignore só é aberto nos diretórios em que a própria listagem mostra que ele existe
+                if self.use_gitignore and any(entry.name == '.gitignore' for entry in entries):
+                    gitignore = GitIgnore.from_directory(directory)
+                    if gitignore:
+                        gitignores = gitignores + [gitignore]
+
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        if entry.name in self.ignored_directories or self._is_gitignored(gitignores, entry.path, True):
+                            continue
+                        subdirectories.append(entry.path)
+                    elif entry.name in GRADLE_BUILD_FILES and not self._is_gitignored(gitignores, entry.path, False):
+                        build_files.append(entry.path)
+
+            yield from build_files
+
+            # Empilha em ordem reversa para visitar os subdiretórios na ordem em que foram listados
+            for subdirectory in reversed(subdirectories):
+                pending_directories.append((subdirectory, gitignores))
+
+    @staticmethod
+    def _is_gitignored(gitignores, path, is_directory):
+        # O .gitignore mais próximo tem precedência, como no git
+        for gitignore in reversed(gitignores):
+            result = gitignore.match(path, is_directory)
+            if result is not None:
+                return result
+        return False
+
+    def _settings_module_directories(self):
+        # Lê os include do settings.gradle(.kts); retorna None quando não há settings no projeto
+        for settings_file_name in GRADLE_SETTINGS_FILES:
+            settings_path = os.path.join(self.project_directory, settings_file_name)
+            if os.path.isfile(settings_path):
+                break
+        else:
+            return None
+
+        with open(settings_path, 'r') as settings_file:
+            content = settings_file.read()
+
+        module_directories = []
+        for include_arguments in self.include_pattern.findall(content):
+            for module_path in re.findall(r'["\']([^"\']+)["\']', include_arguments):
+                module_directory = os.path.join(self.project_directory, *module_path.strip(':').split(':'))
+                if module_directory not in module_directories:
+                    module_directories.append(module_directory)
+        return module_directories
+
+    def _module_build_files(self, module_directories):
+        # Visita apenas o projeto raiz e os módulos declarados no settings
+        for module_directory in [self.project_directory] + module_directories:
+            with self._phase('discovery'):
+                build_files = [
+                    os.path.join(module_directory, file_name)
+                    for file_name in GRADLE_BUILD_FILES
+                    if os.path.isfile(os.path.join(module_directory, file_name))
+                ]
+            yield from build_files
+
+    def _phase(self, name):
+        # Sem profiler os hooks são um contexto vazio, sem nenhuma medição
+        if self.profiler is None:
+            return nullcontext()
+        return self.profiler.phase(name)
+
+    def _parse_files(self, gradle_files):
+        # Em modo serial lê e escaneia um arquivo por vez; com jobs > 1 distribui os arquivos entre processos.
+        # Em ambos os casos os resultados saem na mesma ordem de gradle_files, garantindo um merge determinístico
+        profile = self.profiler is not None
+        if self.jobs <= 1:
+            parse_function = self.parse_file_with_stats if profile else self.parse_file
+            file_results = map(parse_function, gradle_files)
+            executor = None
+        else:
+            executor = ProcessPoolExecutor(
+                max_workers=self.jobs,
+                initializer=_init_parser_worker,
+                initargs=(self.dependency_configurations, profile),
+            )
+            file_results = executor.map(_parse_file_in_worker, gradle_files, chunksize=PARSE_CHUNKSIZE)
+
+        try:
+            for file_result in file_results:
+                if profile:
+                    file_result, file_stats = file_result
+                    self.profiler.record_file(file_stats)
+                yield file_result
+        finally:
+            if executor is not None:
+                executor.shutdown()
+
+    def _cache_fingerprint(self):
+        # Muda sempre que as configurações ou as expressões regulares mudam, invalidando o cache
+        fingerprint_source = json.dumps([
+            self.dependency_configurations,
+            self.scanner_pattern.pattern,
+        ])
+        return hashlib.sha256(fingerprint_source.encode('utf-8')).hexdigest()
+
+    def _load_cache(self, fingerprint):
+        try:
+            with open(self.cache_path, 'r') as cache_file:
+                cache = json.load(cache_file)
+        except (OSError, ValueError):
+            return {}
+
+        if cache.get('version') != PARSE_CACHE_VERSION or cache.get('fingerprint') != fingerprint:
+            logger.info("Parse cache is outdated, reparsing all files.")
+            return {}
+        return cache.get('files', {})
+
+    def _save_cache(self, fingerprint, cached_files):
+        # Grava em um arquivo temporário e renomeia, para nunca deixar um cache pela metade
+        cache = {'version': PARSE_CACHE_VERSION, 'fingerprint': fingerprint, 'files': cached_files}
+        temp_path = f'{self.cache_path}.tmp'
+        cache_directory = os.path.dirname(self.cache_path)
+        if cache_directory:
+            os.makedirs(cache_directory, exist_ok=True)
+        try:
+            with open(temp_path, 'w') as cache_file:
+                json.dump(cache, cache_file)
+            os.replace(temp_path, self.cache_path)
+        except OSError:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+    def _parse_files_with_cache(self, gradle_files):
+        # Reaproveita o resultado dos arquivos que não mudaram e só reprocessa os arquivos alterados
+        fingerprint = self._cache_fingerprint()
+        previous_files = self._load_cache(fingerprint)
+        cached_files = {}
+        dirty_files = []
+
+        for gradle_file in gradle_files:
+            stat = os.stat(gradle_file)
+            entry = previous_files.get(gradle_file)
+            if entry and entry['mtime_ns'] == stat.st_mtime_ns and entry['size'] == stat.st_size:
+                cached_files[gradle_file] = entry
+                continue
+
+            # mtime ou tamanho mudaram: confere o hash do conteúdo antes de reprocessar
+            with open(gradle_file, 'rb') as file:
+                content_hash = hashlib.sha256(file.read()).hexdigest()
+            if entry and entry['sha256'] == content_hash:
+                entry.update(mtime_ns=stat.st_mtime_ns, size=stat.st_size)
+                cached_files[gradle_file] = entry
+                continue
+
+            cached_files[gradle_file] = {'mtime_ns': stat.st_mtime_ns, 'size': stat.st_size, 'sha256': content_hash}
+            dirty_files.append(gradle_file)
+
+        for gradle_file, (dependencies, plugins, bundles) in zip(dirty_files, self._parse_files(dirty_files)):
+            cached_files[gradle_file].update(dependencies=dependencies, plugins=plugins, bundles=bundles)
+
+        logger.info(f"Parse cache: {len(cached_files) - len(dirty_files)} unchanged, {len(dirty_files)} reparsed.")
+        try:
+            self._save_cache(fingerprint, cached_files)
+        except OSError as e:
+            # O cache é só uma otimização: uma falha ao gravá-lo não pode descartar o resultado do parsing
+            logger.warning(f"Could not save parse cache to {self.cache_path}: {str(e)}")
+
+        # Devolve os resultados na ordem de gradle_files (a ordem de inserção de cached_files), como no parsing sem cache
+        return [(entry['dependencies'], entry['plugins'], entry['bundles']) for entry in cached_files.values()]
+
+    def parse_file(self, gradle_file):
+        # Lê um único arquivo Gradle e devolve o resultado do scanner para ele
+        with open(gradle_file, 'r') as file:
+            content = file.read()
+        return self.scan_content(content)
+
+    def parse_file_with_stats(self, gradle_file):
+        # Igual a parse_file, medindo separadamente a leitura e o regex; usado apenas com o profiler ativo
+        start = time.perf_counter()
+        with open(gradle_file, 'r') as file:
+            content = file.read()
+        read_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        dependencies, plugins, bundles = self.scan_content(content)
+        match_time = time.perf_counter() - start
+
+        file_stats = {
+            'path': gradle_file,
+            'bytes_read': len(content.encode('utf-8')),
+            'matches': len(dependencies) + len(plugins) + len(bundles),
+            'read_time': read_time,
+            'match_time': match_time,
+        }
+        return (dependencies, plugins, bundles), file_stats
+
+    def merge_file_result(self, dependencies, plugins, bundles):
+        # Encontra dependências
+        for group, name, version in dependencies:
+            key = name.lower()  # Use o nome como chave única
+            if key not in self.gradle_dependencies:
+                self.gradle_dependencies[key] = {
+                    "group": group,
+                    "name": name,
+                    "version": version,
+                }
+
+        # Encontra plugins
+        for plugin_group, plugin_name in plugins:
+            plugin_key = f'{plugin_group}:{plugin_name}'
+            self.gradle_plugins[plugin_key] = {
+                "group": plugin_group,
+                "name": plugin_name,
+            }
+
+        # Encontra bundles
+        for bundle_group, bundle_name, bundle_version in bundles:
+            bundle_key = f'{bundle_group}:{bundle_name}'
+            self.gradle_bundles[bundle_key] = {
+                "group": bundle_group,
+                "name": bundle_name,
+                "version": bundle_version,
+            }
+
+    def _version_aliases(self):
+        # Bibliotecas com o mesmo group e a mesma versão compartilham um único alias em [versions],
+        # nomeado pela primeira biblioteca encontrada
+        aliases_by_group_version = {}
+        version_aliases = {}
+        for key, value in self.gradle_dependencies.items():
+            group_version = (value["group"], value["version"])
+            version_aliases[key] = aliases_by_group_version.setdefault(group_version, key)
+        return version_aliases
+
+    def render_toml(self):
+        # Monta o catálogo inteiro em memória antes de qualquer escrita em disco
+        version_aliases = self._version_aliases()
+        toml_buffer = io.StringIO()
+
+        toml_buffer.write("[versions]\n")
+        for key, value in self.gradle_dependencies.items():
+            if version_aliases[key] == key:
+                toml_buffer.write(f'{key} = "{value["version"]}"\n')
+
+        toml_buffer.write("\n[libraries]\n")
+        for key, value in self.gradle_dependencies.items():
+            toml_buffer.write(f'{key} = {{ group = "{value["group"]}", name = "{value["name"]}", version = "{version_aliases[key]}" }}\n')
+
+        toml_buffer.write("\n[plugins]\n")
+        for key, value in self.gradle_plugins.items():
+            toml_buffer.write(f'{key} = {{ group = "{value["group"]}", name = "{value["name"]}" }}\n')
+
+        toml_buffer.write("\n[bundles]\n")
+        for key, value in self.gradle_bundles.items():
+            toml_buffer.write(f'{key} = {{ group = "{value["group"]}", name = "{value["name"]}", version = "{value["version"]}" }}\n')
+
+        return toml_buffer.getvalue()
+
     def save_to_toml(self, output_file_path):
+        with self._phase('toml_emission'):
+            self._save_to_toml(output_file_path)
+
+    def _save_to_toml(self, output_file_path):
+        temp_path = None
         try:
             # Salva as dependências, plugins e bundles em um arquivo TOML
-            with open(output_file_path, 'w') as toml_file:
-                toml_file.write("[versions]\n")
-                for key, value in self.gradle_dependencies.items():
-                    toml_file.write(f'{key} = "{value["version"]}"\n')
-
-                toml_file.write("\n[libraries]\n")
-                for key, value in self.gradle_dependencies.items():
-                    toml_file.write(f'{key} = {{ group = "{value["group"]}", name = "{value["name"]}", version = "{key}" }}\n')
+            toml_content = self.render_toml()
 
-                toml_file.write("\n[plugins]\n")
-                for key, value in self.gradle_plugins.items():
-                    toml_file.write(f'{key} = {{ group = "{value["group"]}", name = "{value["name"]}" }}\n')
+            # Não regrava o catálogo quando o conteúdo não mudou
+            try:
+                with open(output_file_path, 'r') as toml_file:
+                    if toml_file.read() == toml_content:
+                        logger.info(f"{output_file_path} is up to date.")
+                        return
+            except FileNotFoundError:
+                pass
 
-                toml_file.write("\n[bundles]\n")
-                for key, value in self.gradle_bundles.items():
-                    toml_file.write(f'{key} = {{ group = "{value["group"]}", name = "{value["name"]}", version = "{value["version"]}" }}\n')
+            # Escreve em um arquivo temporário no mesmo diretório e renomeia de forma atômica,
+            # para nunca deixar um catálogo truncado para trás
+            temp_path = f'{output_file_path}.tmp'
+            with open(temp_path, 'w') as toml_file:
+                toml_file.write(toml_content)
+                toml_file.flush()
+                os.fsync(toml_file.fileno())
+            os.replace(temp_path, output_file_path)
+            temp_path = None
 
             logger.info(f"Saved data to {output_file_path}.")
         except Exception as e:
             logger.error(f"Error while saving to TOML: {str(e)}")
+            raise
+        finally:
+            if temp_path is not None and os.path.exists(temp_path):
+                os.remove(temp_path)
+
+    def _build_replacement_patterns(self):
+        # Uma única alternância com todas as coordenadas conhecidas, por tipo de aspas, e o dicionário de substituições
+        replacements = {}
+        for key, value in self.gradle_dependencies.items():
+            coordinate = f'{value["group"]}:{value["name"]}:{value["version"]}'
+            replacements[coordinate] = f'libs.{key.replace("-", ".")}'
+
+        coordinates = '|'.join(re.escape(coordinate) for coordinate in sorted(replacements, key=len, reverse=True))
+        patterns = {
+            'groovy': re.compile(f"'({coordinates})'"),
+            'kotlin': re.compile(f'"({coordinates})"'),
+        }
+        return patterns, replacements
 
     def replace_dependencies(self):
+        with self._phase('replacement'):
+            self._replace_dependencies()
+
+    def _replace_dependencies(self):
         try:
-            # Processa os arquivos Gradle novamente para substituir as dependências
+            if not self.gradle_dependencies:
+                logger.info("No dependencies to replace.")
+                return
+
+            patterns, replacements = self._build_replacement_patterns()
+            rewritten_files = 0
+
+            # Processa os arquivos Gradle novamente para substituir as dependências, em uma única passada por arquivo
             for gradle_file in self.gradle_files:
                 with open(gradle_file, 'r') as file:
                     content = file.read()
-                    for key, value in self.gradle_dependencies.items():
-                        dependency_string = f'\'{value["group"]}:{value["name"]}:{value["version"]}\''
-                        if gradle_file.endswith('.gradle.kts'):
-                            dependency_string = f'\"{value["group"]}:{value["name"]}:{value["version"]}\"'
-                        replacement = f'libs.{key.replace("-", ".")}'
-                        content = content.replace(dependency_string, replacement)
+
+                pattern = patterns['kotlin'] if gradle_file.endswith('.gradle.kts') else patterns['groovy']
+                content, replaced_count = pattern.subn(lambda match: replacements[match.group(1)], content)
+
+                # Arquivos sem substituições não são regravados, preservando o mtime para o up-to-date check do Gradle
+                if not replaced_count:
+                    continue
 
                 # Substitui o conteúdo do arquivo original pelo conteúdo modificado
                 with open(gradle_file, 'w') as file:
                     file.write(content)
+                rewritten_files += 1
 
-            logger.info("Replaced dependencies successfully.")
+            logger.info(f"Replaced dependencies successfully ({rewritten_files} of {len(self.gradle_files)} files rewritten).")
         except Exception as e:
             logger.error(f"Error while replacing dependencies: {str(e)}")
 
+# Parser usado pelos processos do pool; criado uma vez por processo no initializer
+_worker_parser = None
+
+
+_worker_profile = False
+
+
+def _init_parser_worker(dependency_configurations, profile):
+    global _worker_parser, _worker_profile
+    _worker_profile = profile
+    _worker_parser = GradleParser(None, replace=False)
+    _worker_parser.dependency_configurations = list(dependency_configurations)
+    _worker_parser.scanner_pattern = _worker_parser._build_scanner_pattern()
+
+
+def _parse_file_in_worker(gradle_file):
+    if _worker_profile:
+        return _worker_parser.parse_file_with_stats(gradle_file)
+    return _worker_parser.parse_file(gradle_file)
+
+
+def add_arguments(parser):
+    parser.add_argument('project_directory', type=str, help='Caminho para o diretório do projeto')
+    parser.add_argument('--replace', action='store_true', help='Substituir as dependências nos arquivos Gradle')
+    parser.add_argument('--jobs', type=int, default=1, help='Quantidade de processos usados no parsing dos arquivos Gradle')
+    parser.add_argument('--cache', type=str, default=None, help='Arquivo de cache do parsing; só os arquivos Gradle alterados são reprocessados')
+    parser.add_argument('--ignore', action='append', default=[], help='Nome de diretório adicional a ser ignorado na descoberta (pode repetir)')
+    parser.add_argument('--no-gitignore', action='store_true', help='Não respeitar os arquivos .gitignore na descoberta')
+    parser.add_argument('--follow-settings', action='store_true', help='Visitar apenas os módulos declarados com include no settings.gradle(.kts)')
+    parser.add_argument('--profile', type=str, default=None, help='Grava um relatório JSON com o tempo de cada fase e as estatísticas por arquivo')
+    parser.add_argument('--profile-top', type=int, default=10, help='Quantidade de arquivos mais lentos exibidos no resumo do profile')
+
+
+def run(args):
+    profiler = ParseProfiler() if args.profile else None
+    gradle_parser = GradleParser(
+        args.project_directory,
+        args.replace,
+        jobs=args.jobs,
+        cache_path=args.cache,
+        profiler=profiler,
+        ignored_directories=DEFAULT_IGNORED_DIRECTORIES | set(args.ignore),
+        use_gitignore=not args.no_gitignore,
+        follow_settings=args.follow_settings,
+    )
+    gradle_parser.parse()
+    os.makedirs(f'{args.project_directory}/gradle', exist_ok=True)
+    gradle_parser.save_to_toml(os.path.join(f'{args.project_directory}/gradle', 'libs.versions.toml'))
+
+    if args.replace:
+        gradle_parser.replace_dependencies()
+
+    if profiler:
+        profiler.save(args.profile)
+        profiler.log_slowest_files(args.profile_top)
+
+
 class TestGradleParser(unittest.TestCase):
     def setUp(self):
         # Cria um diretório temporário e arquivos de exemplo para testar o parser
@@ -172,6 +682,7 @@ class TestGradleParser(unittest.TestCase):
         # Testa a substituição de dependências nos arquivos Gradle
         gradle_parser = GradleParser(self.project_directory, replace=True)
         gradle_parser.parse()
+        gradle_parser.replace_dependencies()
 
         # Verifica se a substituição ocorreu corretamente
         with open(self.build_gradle_path, 'r') as build_gradle:
@@ -179,15 +690,242 @@ class TestGradleParser(unittest.TestCase):
             self.assertNotIn('com.example:library:1.0', updated_content)
             self.assertIn('libs.library', updated_content)
 
-if __name__ == '__main__':
-    parser = argparse.ArgumentParser(description='Processa arquivos Gradle e cria um arquivo TOML com dependências, plugins e bundles.')
-    parser.add_argument('project_directory', type=str, help='Caminho para o diretório do projeto')
-    parser.add_argument('--replace', action='store_true', help='Substituir as dependências nos arquivos Gradle')
-    args = parser.parse_args()
+    def test_scan_content_groups_by_configuration(self):
+        # Testa se o scanner mantém a ordem por configuração e encontra plugins e bundles
+        gradle_parser = GradleParser(self.project_directory, replace=False)
+        content = """
+        apply plugin: 'com.android:application'
+        testImplementation("junit:junit:4.12")
+        kaptTest("com.google.dagger:dagger-compiler:2.40")
+        implementation("com.example:library:1.0")
+        kapt("com.google.dagger:hilt-compiler:2.40")
+        bundle "com.example:bundle:2.0"
+        """
+        dependencies, plugins, bundles = gradle_parser.scan_content(content)
 
-    gradle_parser = GradleParser(args.project_directory, args.replace)
-    gradle_parser.parse()
-    gradle_parser.save_to_toml(os.path.join(f'{args.project_directory}/gradle', 'libs.versions.toml'))
+        self.assertEqual(dependencies, [
+            ('com.example', 'library', '1.0'),
+            ('junit', 'junit', '4.12'),
+            ('com.google.dagger', 'dagger-compiler', '2.40'),
+            ('com.google.dagger', 'hilt-compiler', '2.40'),
+        ])
+        self.assertEqual(plugins, [('com.android', 'application')])
+        self.assertEqual(bundles, [('com.example', 'bundle', '2.0')])
 
-    if args.replace:
+    def test_scan_content_groovy_without_parentheses(self):
+        # Testa se a forma do Groovy sem parênteses é reconhecida, com aspas simples ou duplas
+        gradle_parser = GradleParser(self.project_directory, replace=False)
+        content = """
+        implementation 'com.example:library:1.0'
+        kapt "com.google.dagger:hilt-compiler:2.40"
+        implementation project(':core')
+        """
+        dependencies, _, _ = gradle_parser.scan_content(content)
+
+        self.assertEqual(dependencies, [
+            ('com.example', 'library', '1.0'),
+            ('com.google.dagger', 'hilt-compiler', '2.40'),
+        ])
+
+    def test_parse_with_jobs_is_deterministic(self):
+        # Testa se o parsing com vários processos gera o mesmo TOML que o parsing serial
+        for module_index in range(6):
+            module_directory = os.path.join(self.project_directory, f'module{module_index}')
+            os.makedirs(module_directory)
+            with open(os.path.join(module_directory, 'build.gradle.kts'), 'w') as build_gradle:
+                build_gradle.write(f'implementation("com.example:shared:{module_index}.0")\n')
+                build_gradle.write(f'implementation("com.example:module{module_index}:1.0")\n')
+
+        outputs = []
+        for jobs in (1, 3):
+            gradle_parser = GradleParser(self.project_directory, replace=False, jobs=jobs)
+            gradle_parser.parse()
+            output_path = os.path.join(self.temp_dir, f'libs-{jobs}.versions.toml')
+            gradle_parser.save_to_toml(output_path)
+            with open(output_path, 'r') as toml_file:
+                outputs.append(toml_file.read())
+
+        self.assertIn('shared = ', outputs[0])
+        self.assertEqual(outputs[0], outputs[1])
+
+    def test_save_to_toml_shares_version_aliases(self):
+        # Testa se bibliotecas com o mesmo group e versão compartilham o alias e se o arquivo não é regravado sem mudanças.
+        # O módulo fica em uma subpasta: a descoberta entrega o build.gradle da raiz antes, qualquer que seja a ordem do scandir
+        app_directory = os.path.join(self.project_directory, 'app')
+        os.makedirs(app_directory)
+        with open(os.path.join(app_directory, 'build.gradle.kts'), 'w') as build_gradle:
+            build_gradle.write(
+                'implementation("androidx.room:room-runtime:2.6.0")\n'
+                'implementation("androidx.room:room-ktx:2.6.0")\n'
+                'implementation("com.example:library:1.0")\n'
+            )
+        output_path = os.path.join(self.temp_dir, 'libs.versions.toml')
+
+        gradle_parser = GradleParser(self.project_directory, replace=False)
+        gradle_parser.parse()
+        gradle_parser.save_to_toml(output_path)
+
+        with open(output_path, 'r') as toml_file:
+            toml_content = toml_file.read()
+        # O build.gradle do setUp já declara com.example:library:1.0 e o junit
+        self.assertTrue(toml_content.startswith('[versions]\nlibrary = "1.0"\njunit = "4.12"\nroom-runtime = "2.6.0"\n\n'))
+        self.assertIn('room-ktx = { group = "androidx.room", name = "room-ktx", version = "room-runtime" }', toml_content)
+
+        saved_mtime_ns = os.stat(output_path).st_mtime_ns
+        gradle_parser.save_to_toml(output_path)
+        self.assertEqual(os.stat(output_path).st_mtime_ns, saved_mtime_ns)
+        self.assertFalse([file_name for file_name in os.listdir(self.temp_dir) if file_name.endswith('.tmp')])
+
+    def test_replace_dependencies_single_pass(self):
+        # Testa se a substituição troca as coordenadas conhecidas e não regrava arquivos sem ocorrências
+        app_directory = os.path.join(self.project_directory, 'app')
+        untouched_directory = os.path.join(self.project_directory, 'untouched')
+        os.makedirs(app_directory)
+        os.makedirs(untouched_directory)
+        app_path = os.path.join(app_directory, 'build.gradle.kts')
+        untouched_path = os.path.join(untouched_directory, 'build.gradle.kts')
+        with open(app_path, 'w') as build_gradle:
+            build_gradle.write('implementation("com.example:core-ktx:1.0")\nkapt("com.example:compiler:2.0")\n')
+        with open(untouched_path, 'w') as build_gradle:
+            build_gradle.write('plugins { id("com.android.library") }\n')
+        untouched_mtime_ns = os.stat(untouched_path).st_mtime_ns
+
+        gradle_parser = GradleParser(self.project_directory, replace=True)
+        gradle_parser.parse()
         gradle_parser.replace_dependencies()
+
+        with open(app_path, 'r') as build_gradle:
+            self.assertEqual(build_gradle.read(), 'implementation(libs.core.ktx)\nkapt(libs.compiler)\n')
+        self.assertEqual(os.stat(untouched_path).st_mtime_ns, untouched_mtime_ns)
+
+    def test_profiler_records_phases_and_files(self):
+        # Testa se o profiler registra as fases e as estatísticas de cada arquivo
+        with open(os.path.join(self.project_directory, 'build.gradle.kts'), 'w') as build_gradle:
+            build_gradle.write('implementation("com.example:library:1.0")\n')
+
+        profiler = ParseProfiler()
+        gradle_parser = GradleParser(self.project_directory, replace=False, profiler=profiler)
+        gradle_parser.parse()
+        gradle_parser.save_to_toml(os.path.join(self.temp_dir, 'libs.versions.toml'))
+
+        report = profiler.report()
+        self.assertEqual(set(report['phases']), {'discovery', 'parse', 'toml_emission'})
+        self.assertEqual(report['totals']['files'], 2)
+        # Duas dependências no build.gradle do setUp e uma no build.gradle.kts
+        self.assertEqual(report['totals']['matches'], 3)
+
+    def test_profiler_phases_are_exclusive(self):
+        # Testa se o tempo de uma fase aninhada (descoberta dentro do parsing) não é contado também na fase externa
+        profiler = ParseProfiler()
+        with profiler.phase('parse'):
+            with profiler.phase('discovery'):
+                time.sleep(0.05)
+
+        self.assertGreaterEqual(profiler.phases['discovery'], 0.05)
+        self.assertLess(profiler.phases['parse'], 0.05)
+
+    def test_discovery_prunes_ignored_directories(self):
+        # Testa se a descoberta ignora build/, diretórios do .gitignore e, opcionalmente, segue o settings.gradle
+        for relative_path in ('app', 'lib', 'build/generated', 'vendor/tool', 'undeclared'):
+            module_directory = os.path.join(self.project_directory, relative_path)
+            os.makedirs(module_directory)
+            with open(os.path.join(module_directory, 'build.gradle.kts'), 'w') as build_gradle:
+                build_gradle.write('')
+        with open(os.path.join(self.project_directory, '.gitignore'), 'w') as gitignore:
+            gitignore.write('# dependências vendorizadas\n/vendor/\n')
+        with open(os.path.join(self.project_directory, 'settings.gradle'), 'w') as settings_gradle:
+            settings_gradle.write("rootProject.name = 'test'\ninclude ':app',\n        ':lib'\n")
+
+        def relative_paths(gradle_parser):
+            return sorted(os.path.relpath(path, self.project_directory) for path in gradle_parser.discover_gradle_files())
+
+        self.assertEqual(relative_paths(GradleParser(self.project_directory, replace=False)), [
+            os.path.join('app', 'build.gradle.kts'),
+            'build.gradle',
+            os.path.join('lib', 'build.gradle.kts'),
+            os.path.join('undeclared', 'build.gradle.kts'),
+        ])
+        self.assertIn(
+            os.path.join('vendor', 'tool', 'build.gradle.kts'),
+            relative_paths(GradleParser(self.project_directory, replace=False, use_gitignore=False)),
+        )
+        self.assertEqual(relative_paths(GradleParser(self.project_directory, replace=False, follow_settings=True)), [
+            os.path.join('app', 'build.gradle.kts'),
+            'build.gradle',
+            os.path.join('lib', 'build.gradle.kts'),
+        ])
+
+    def test_settings_include_spanning_lines(self):
+        # Testa se os include que continuam nas linhas seguintes (vírgula no fim ou parênteses) trazem todos os módulos
+        gradle_parser = GradleParser(self.project_directory, replace=False)
+        for settings_file_name, content in (
+            ('settings.gradle', "include ':app',\n        ':lib'\ninclude ':core'\n"),
+            ('settings.gradle.kts', 'include(\n    ":app",\n    ":lib",\n)\ninclude(":core")\n'),
+        ):
+            settings_path = os.path.join(self.project_directory, settings_file_name)
+            with open(settings_path, 'w') as settings_gradle:
+                settings_gradle.write(content)
+
+            self.assertEqual(gradle_parser._settings_module_directories(), [
+                os.path.join(self.project_directory, module_name) for module_name in ('app', 'lib', 'core')
+            ])
+            os.remove(settings_path)
+
+    def test_discovery_opens_only_existing_gitignores(self):
+        # Testa se a descoberta só tenta abrir o .gitignore dos diretórios que o listam
+        for relative_path in ('app', 'lib', 'lib/src'):
+            os.makedirs(os.path.join(self.project_directory, relative_path))
+        with open(os.path.join(self.project_directory, 'lib', '.gitignore'), 'w') as gitignore:
+            gitignore.write('src/\n')
+
+        with mock.patch.object(GitIgnore, 'from_directory', wraps=GitIgnore.from_directory) as from_directory:
+            list(GradleParser(self.project_directory, replace=False).discover_gradle_files())
+
+        self.assertEqual([call.args[0] for call in from_directory.call_args_list], [os.path.join(self.project_directory, 'lib')])
+
+    def test_parse_cache_reparses_only_changed_files(self):
+        # Testa se o cache reaproveita arquivos inalterados e reprocessa os modificados
+        kts_path = os.path.join(self.project_directory, 'build.gradle.kts')
+        with open(kts_path, 'w') as build_gradle:
+            build_gradle.write('implementation("com.example:cached:1.0")\n')
+        cache_path = os.path.join(self.temp_dir, 'parse-cache.json')
+
+        first_parser = GradleParser(self.project_directory, replace=False, cache_path=cache_path)
+        first_parser.parse()
+        self.assertEqual(first_parser.gradle_dependencies['cached']['version'], '1.0')
+
+        previous_mtime_ns = os.stat(kts_path).st_mtime_ns
+        with open(kts_path, 'w') as build_gradle:
+            build_gradle.write('implementation("com.example:cached:2.0")\n')
+        # Garante um mtime diferente mesmo em sistemas de arquivos com baixa resolução de tempo
+        os.utime(kts_path, ns=(previous_mtime_ns + 1_000_000_000, previous_mtime_ns + 1_000_000_000))
+
+        with self.assertLogs(logger, level='INFO') as logs:
+            second_parser = GradleParser(self.project_directory, replace=False, cache_path=cache_path)
+            second_parser.parse()
+        self.assertEqual(second_parser.gradle_dependencies['cached']['version'], '2.0')
+        self.assertIn('1 unchanged, 1 reparsed', '\n'.join(logs.output))
+
+        with open(cache_path, 'r') as cache_file:
+            self.assertEqual(json.load(cache_file)['version'], PARSE_CACHE_VERSION)
+
+    def test_parse_keeps_results_when_cache_cannot_be_saved(self):
+        # Testa se uma falha ao gravar o cache só gera um aviso e não descarta as dependências encontradas
+        with open(os.path.join(self.project_directory, 'build.gradle.kts'), 'w') as build_gradle:
+            build_gradle.write('implementation("com.example:uncached:1.0")\n')
+        not_a_directory = os.path.join(self.temp_dir, 'arquivo')
+        with open(not_a_directory, 'w') as file:
+            file.write('')
+
+        gradle_parser = GradleParser(self.project_directory, replace=False, cache_path=os.path.join(not_a_directory, 'cache.json'))
+        with self.assertLogs(logger, level='WARNING') as logs:
+            gradle_parser.parse()
+
+        self.assertIn('uncached', gradle_parser.gradle_dependencies)
+        self.assertIn('Could not save parse cache', '\n'.join(logs.output))
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description='Processa arquivos Gradle e cria um arquivo TOML com dependências, plugins e bundles.')
+    add_arguments(parser)
+    run(parser.parse_args())
@@ -0,0 +1,179 @@
+import io
+import os
+import shutil
+import zlib
+import tarfile
+import zipfile
+import tempfile
+import unittest
+from unittest import mock
+
+from file_dedup import unique_file_name
+from file_mover import has_allowed_extension
+
+# Extensões tratadas como arquivos compactados (comparadas em minúsculas)
+ARCHIVE_EXTENSIONS = ('.zip', '.tar', '.tar.gz', '.tgz')
+
+# Tamanho do buffer usado para copiar cada membro do arquivo compactado para o disco
+COPY_BUFFER_BYTES = 1024 * 1024
+
+# Erros de leitura de um compactado. O zipfile levanta NotImplementedError para compressões
+# não suportadas (ex.: Deflate64) e RuntimeError para membros criptografados
+EXTRACTION_ERRORS = (OSError, EOFError, zlib.error, zipfile.BadZipFile, tarfile.TarError, NotImplementedError, RuntimeError)
+
+
+def is_archive(file_name):
+    return file_name.lower().endswith(ARCHIVE_EXTENSIONS)
+
+
+def _iter_zip_members(archive_path):
+    # Devolve (nome, tamanho_declarado, abrir_membro) de cada membro, sem carregar nada em memória.
+    # O membro só é aberto por quem extrai, para que um erro de abertura afete apenas ele.
+    # A leitura de um membro de zip confere o CRC ao chegar no fim e levanta BadZipFile se não bater
+    with zipfile.ZipFile(archive_path) as archive:
+        for info in archive.infolist():
+            if info.is_dir():
+                continue
+            yield info.filename, info.file_size, lambda info=info: archive.open(info)
+
+
+def _iter_tar_members(archive_path):
+    # Modo "r|*" lê o tar (comprimido ou não) sequencialmente, sem seek, como um stream;
+    # cada membro precisa ser aberto antes de avançar para o próximo.
+    # Links e arquivos especiais não podem ser extraídos e vêm com abrir_membro None
+    with tarfile.open(archive_path, 'r|*') as archive:
+        for member in archive:
+            if member.isdir():
+                continue
+            if not member.isfile():
+                yield member.name, member.size, None
+                continue
+            yield member.name, member.size, lambda member=member: archive.extractfile(member)
+
+
+def extract_archive(archive_path, destination_directory, allowed_extensions, reserve_name):
+    # Extrai, achatados no destino, só os membros com extensão permitida.
+    # reserve_name(nome) devolve um nome livre no destino (a mesma lógica de colisão dos arquivos movidos).
+    # Cada membro é gravado em "<nome>.part" e renomeado só depois de conferido o tamanho.
+    # Retorna (quantidade_extraída, verificado); verificado só é True se todos os membros chegaram ao destino,
+    # ou seja, nenhum falhou nem foi deixado de fora pelo filtro de extensões
+    iter_members = _iter_zip_members if archive_path.lower().endswith('.zip') else _iter_tar_members
+    extracted = 0
+    verified = True
+
+    try:
+        for member_name, member_size, open_member in iter_members(archive_path):
+            file_name = os.path.basename(member_name)
+            if open_member is None or not has_allowed_extension(file_name, allowed_extensions):
+                # Membro que fica só dentro do compactado: ele não pode ser removido
+                verified = False
+                continue
+
+            partial_path = None
+            try:
+                with open_member() as member_file:
+                    destination_path = os.path.join(destination_directory, reserve_name(file_name))
+                    partial_path = f"{destination_path}.part"
+                    with open(partial_path, 'wb') as output_file:
+                        shutil.copyfileobj(member_file, output_file, COPY_BUFFER_BYTES)
+                        written = output_file.tell()
+                if written != member_size:
+                    raise OSError(f"tamanho extraído {written} difere do declarado {member_size}")
+                os.replace(partial_path, destination_path)
+            except EXTRACTION_ERRORS as e:
+                print(f"Erro ao extrair '{member_name}' de '{os.path.basename(archive_path)}': {e}")
+                verified = False
+                if partial_path is not None and os.path.exists(partial_path):
+                    os.remove(partial_path)
+            else:
+                extracted += 1
+    except EXTRACTION_ERRORS as e:
+        print(f"Erro ao ler o arquivo compactado '{os.path.basename(archive_path)}': {e}")
+        verified = False
+
+    return extracted, verified
+
+
+def _set_zip_header_field(content, member_index, local_offset, central_offset, value):
+    # Altera um campo de 2 bytes do cabeçalho local e do diretório central de um membro de zip
+    content = bytearray(content)
+    for signature, offset in ((b'PK\x03\x04', local_offset), (b'PK\x01\x02', central_offset)):
+        position = -1
+        for _ in range(member_index + 1):
+            position = content.index(signature, position + 1)
+        content[position + offset:position + offset + 2] = value.to_bytes(2, 'little')
+    return bytes(content)
+
+
+class TestFileArchives(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.destination = os.path.join(self.temp_dir, 'destino')
+        os.makedirs(self.destination)
+        self.used_names = set()
+        stdout_patcher = mock.patch('sys.stdout', new_callable=io.StringIO)
+        stdout_patcher.start()
+        self.addCleanup(stdout_patcher.stop)
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def write_zip(self, members, file_name='fotos.zip'):
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_STORED) as archive:
+            for member_name, content in members:
+                archive.writestr(member_name, content)
+        return os.path.join(self.temp_dir, file_name), buffer.getvalue()
+
+    def save(self, archive_path, content):
+        with open(archive_path, 'wb') as file:
+            file.write(content)
+        return archive_path
+
+    def extract(self, archive_path, allowed_extensions=('.jpg',)):
+        return extract_archive(archive_path, self.destination, list(allowed_extensions), lambda name: unique_file_name(name, self.used_names))
+
+    def test_extracts_flattened_and_renames_collisions(self):
+        archive_path = self.save(*self.write_zip([('a/foto.jpg', b'um'), ('b/foto.jpg', b'dois')]))
+
+        self.assertEqual(self.extract(archive_path), (2, True))
+        self.assertEqual(sorted(os.listdir(self.destination)), ['foto.jpg', 'foto_1.jpg'])
+
+    def test_filtered_members_keep_archive_unverified(self):
+        # Testa se um compactado com membros fora do filtro de extensões não é dado como verificado (e, portanto, não é removido)
+        archive_path = self.save(*self.write_zip([('foto.jpg', b'foto'), ('contrato.pdf', b'pdf'), ('notas.txt', b'txt')]))
+
+        self.assertEqual(self.extract(archive_path), (1, False))
+        self.assertEqual(os.listdir(self.destination), ['foto.jpg'])
+
+    def test_unsupported_compression_does_not_stop_extraction(self):
+        # Testa se um membro com compressão não suportada (Deflate64, método 9) só marca o compactado como não verificado
+        archive_path, content = self.write_zip([('deflate64.jpg', b'comprimido'), ('normal.jpg', b'normal')])
+        self.save(archive_path, _set_zip_header_field(content, 0, 8, 10, 9))
+
+        self.assertEqual(self.extract(archive_path), (1, False))
+        self.assertEqual(os.listdir(self.destination), ['normal.jpg'])
+
+    def test_encrypted_member_does_not_stop_extraction(self):
+        # Testa se um membro criptografado (bit 0 das flags) só marca o compactado como não verificado
+        archive_path, content = self.write_zip([('normal.jpg', b'normal'), ('secreto.jpg', b'secreto')])
+        self.save(archive_path, _set_zip_header_field(content, 1, 6, 8, 1))
+
+        self.assertEqual(self.extract(archive_path), (1, False))
+        self.assertEqual(os.listdir(self.destination), ['normal.jpg'])
+
+    def test_extracts_tar_gz_stream(self):
+        archive_path = os.path.join(self.temp_dir, 'fotos.tar.gz')
+        with tarfile.open(archive_path, 'w:gz') as archive:
+            for member_name, content in (('pasta/a.jpg', b'a'), ('pasta/b.jpg', b'bb')):
+                info = tarfile.TarInfo(member_name)
+                info.size = len(content)
+                archive.addfile(info, io.BytesIO(content))
+
+        self.assertEqual(self.extract(archive_path), (2, True))
+        self.assertEqual(sorted(os.listdir(self.destination)), ['a.jpg', 'b.jpg'])
+
+    def test_corrupted_archive_is_unverified(self):
+        archive_path = self.save(os.path.join(self.temp_dir, 'quebrado.zip'), b'nao e um zip')
+
+        self.assertEqual(self.extract(archive_path), (0, False))
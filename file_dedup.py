@@ -0,0 +1,137 @@
+import os
+import random
+import shutil
+import hashlib
+import tempfile
+import unittest
+from unittest import mock
+
+# Bytes lidos do início e do fim de cada arquivo no hash parcial
+PARTIAL_HASH_BYTES = 64 * 1024
+
+# Tamanho dos blocos lidos no hash completo
+FULL_HASH_CHUNK_BYTES = 1024 * 1024
+
+
+def partial_hash(file_path, size):
+    # Hash do primeiro e do último bloco de 64 KB: descarta quase todos os falsos candidatos lendo no máximo 128 KB
+    digest = hashlib.blake2b(digest_size=16)
+    with open(file_path, 'rb') as file:
+        digest.update(file.read(PARTIAL_HASH_BYTES))
+        if size > 2 * PARTIAL_HASH_BYTES:
+            file.seek(-PARTIAL_HASH_BYTES, os.SEEK_END)
+            digest.update(file.read(PARTIAL_HASH_BYTES))
+        elif size > PARTIAL_HASH_BYTES:
+            digest.update(file.read())
+    return digest.digest()
+
+
+def full_hash(file_path):
+    digest = hashlib.blake2b()
+    with open(file_path, 'rb') as file:
+        for chunk in iter(lambda: file.read(FULL_HASH_CHUNK_BYTES), b''):
+            digest.update(chunk)
+    return digest.digest()
+
+
+def _group_by(entries, key_function, candidate_paths=None):
+    # Agrupa por chave e devolve só os grupos com mais de um arquivo; com candidate_paths,
+    # descarta também os grupos sem nenhum candidato, que não podem revelar um duplicado novo
+    groups = {}
+    for entry in entries:
+        try:
+            key = key_function(entry)
+        except OSError as e:
+            print(f"Erro ao ler o arquivo '{os.path.basename(entry[0])}': {e}")
+            continue
+        groups.setdefault(key, []).append(entry)
+    return [
+        group
+        for group in groups.values()
+        if len(group) > 1 and (candidate_paths is None or any(file_path in candidate_paths for file_path, _ in group))
+    ]
+
+
+def find_identical_files(entries, candidate_paths=None):
+    # Recebe pares (caminho, tamanho) e devolve grupos de caminhos com conteúdo idêntico, na ordem de entrada.
+    # Agrupa por tamanho, depois pelo hash parcial, e só calcula o hash completo de quem ainda colide.
+    # Com candidate_paths (ex.: os arquivos da origem), só são lidos os grupos que contêm algum candidato:
+    # arquivos já no destino nunca são comparados apenas entre si
+    identical_groups = []
+    for size_group in _group_by(entries, lambda entry: entry[1], candidate_paths):
+        size = size_group[0][1]
+        for partial_group in _group_by(size_group, lambda entry: partial_hash(entry[0], size), candidate_paths):
+            if size <= 2 * PARTIAL_HASH_BYTES:
+                # O hash parcial já cobriu o arquivo inteiro
+                identical_groups.append([file_path for file_path, _ in partial_group])
+                continue
+            for full_group in _group_by(partial_group, lambda entry: full_hash(entry[0]), candidate_paths):
+                identical_groups.append([file_path for file_path, _ in full_group])
+    return identical_groups
+
+
+def unique_file_name(file_name, used_names):
+    # "foto.jpg" -> "foto_1.jpg", "foto_2.jpg", ... até encontrar um nome livre; registra o nome escolhido
+    if file_name not in used_names:
+        used_names.add(file_name)
+        return file_name
+    stem, extension = os.path.splitext(file_name)
+    counter = 1
+    while f"{stem}_{counter}{extension}" in used_names:
+        counter += 1
+    unique_name = f"{stem}_{counter}{extension}"
+    used_names.add(unique_name)
+    return unique_name
+
+
+class TestFileDedup(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.rng = random.Random(42)
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def write_file(self, file_name, content):
+        file_path = os.path.join(self.temp_dir, file_name)
+        with open(file_path, 'wb') as file:
+            file.write(content)
+        return file_path, len(content)
+
+    def test_finds_identical_files_by_content(self):
+        # Testa os três níveis: mesmo tamanho, mesmo início/fim (hash parcial) e conteúdo idêntico (hash completo)
+        big_content = self.rng.randbytes(3 * PARTIAL_HASH_BYTES)
+        # Difere só no meio: passa pelo hash parcial e é separado pelo hash completo
+        middle_changed = big_content[:PARTIAL_HASH_BYTES + 10] + b'\x00' + big_content[PARTIAL_HASH_BYTES + 11:]
+        entries = [
+            self.write_file('a.jpg', big_content),
+            self.write_file('b.jpg', self.rng.randbytes(1000)),
+            self.write_file('c.jpg', big_content),
+            self.write_file('d.jpg', middle_changed),
+            self.write_file('e.jpg', b'pequeno'),
+            self.write_file('f.jpg', b'pequeno'),
+        ]
+
+        groups = find_identical_files(entries)
+
+        self.assertEqual(
+            [[os.path.basename(file_path) for file_path in group] for group in groups],
+            [['a.jpg', 'c.jpg'], ['e.jpg', 'f.jpg']],
+        )
+
+    def test_destination_only_groups_are_not_hashed(self):
+        # Testa se arquivos já no destino com o mesmo tamanho entre si não são lidos quando nenhum candidato tem esse tamanho
+        destination_entries = [self.write_file(f'destino-{index}.jpg', self.rng.randbytes(500)) for index in range(50)]
+        candidate = self.write_file('novo.jpg', self.rng.randbytes(700))
+
+        with mock.patch(f'{__name__}.partial_hash', wraps=partial_hash) as hasher:
+            groups = find_identical_files(destination_entries + [candidate], {candidate[0]})
+
+        self.assertEqual(groups, [])
+        self.assertEqual(hasher.call_count, 0)
+
+    def test_unique_file_name(self):
+        used_names = {'foto.jpg', 'foto_1.jpg'}
+        self.assertEqual(unique_file_name('foto.jpg', used_names), 'foto_2.jpg')
+        self.assertEqual(unique_file_name('outra.jpg', used_names), 'outra.jpg')
+        self.assertIn('foto_2.jpg', used_names)
@@ -0,0 +1,485 @@
+import os
+import io
+import sys
+import json
+import time
+import errno
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+# Cópias entre sistemas de arquivos diferentes (ex.: disco local -> NAS) simultâneas
+DEFAULT_COPY_WORKERS = 8
+
+# A cada quantas entradas concluídas o journal é sincronizado com o disco (fsync)
+JOURNAL_SYNC_INTERVAL = 500
+
+
+class MoveJournal:
+    # Journal JSONL só de acréscimo: um cabeçalho com os parâmetros da execução, o plano completo ("move" ... "planned")
+    # e um "done" por arquivo movido. Uma nova execução com o mesmo journal e os mesmos parâmetros retoma
+    # do último "done" gravado, sem reescanear a origem
+    def __init__(self, journal_path, parameters=None):
+        self.journal_path = journal_path
+        # Passa por JSON para comparar com o que foi gravado (tuplas viram listas)
+        self.parameters = json.loads(json.dumps(parameters))
+        self.journal_file = None
+        self.pending_sync = 0
+
+    def load_pending_moves(self):
+        # Retorna os movimentos ainda não concluídos, ou None se não houver um plano completo gravado
+        # para estes mesmos parâmetros
+        try:
+            journal_file = open(self.journal_path, 'r')
+        except FileNotFoundError:
+            return None
+
+        moves = []
+        done_sources = set()
+        planned = False
+        with journal_file:
+            for line_number, line in enumerate(journal_file):
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # Última linha truncada por uma interrupção: tudo antes dela é válido
+                    break
+                if line_number == 0 and (record['type'] != 'header' or record['parameters'] != self.parameters):
+                    print(f"O journal '{self.journal_path}' pertence a outra execução e será descartado; o plano será refeito.")
+                    return None
+                if record['type'] == 'move':
+                    moves.append((record['source'], record['destination']))
+                elif record['type'] == 'planned':
+                    planned = True
+                elif record['type'] == 'done':
+                    done_sources.add(record['source'])
+
+        if not planned:
+            return None
+        return [(source_path, destination_path) for source_path, destination_path in moves if source_path not in done_sources]
+
+    def write_plan(self, moves):
+        self.journal_file = open(self.journal_path, 'w')
+        self.journal_file.write(json.dumps({'type': 'header', 'parameters': self.parameters}) + '\n')
+        for source_path, destination_path in moves:
+            self.journal_file.write(json.dumps({'type': 'move', 'source': source_path, 'destination': destination_path}) + '\n')
+        self.journal_file.write(json.dumps({'type': 'planned', 'moves': len(moves)}) + '\n')
+        self.sync()
+
+    def open_for_append(self):
+        self.journal_file = open(self.journal_path, 'a')
+
+    def record_done(self, source_path):
+        self.journal_file.write(json.dumps({'type': 'done', 'source': source_path}) + '\n')
+        self.journal_file.flush()
+        self.pending_sync += 1
+        if self.pending_sync >= JOURNAL_SYNC_INTERVAL:
+            self.sync()
+
+    def sync(self):
+        self.journal_file.flush()
+        os.fsync(self.journal_file.fileno())
+        self.pending_sync = 0
+
+    def close(self, remove=False):
+        if self.journal_file is not None:
+            self.sync()
+            self.journal_file.close()
+            self.journal_file = None
+        if remove:
+            os.remove(self.journal_path)
+
+
+class ProgressCounter:
+    # Contador de progresso em uma única linha do terminal, atualizado no máximo a cada `interval` segundos
+    def __init__(self, label, total, interval=0.5, stream=None):
+        self.label = label
+        self.total = total
+        self.done = 0
+        self.interval = interval
+        # Resolvido na criação (e não na definição da função), para respeitar um sys.stdout redirecionado
+        self.stream = stream if stream is not None else sys.stdout
+        self.last_update = 0.0
+
+    def advance(self, count=1):
+        self.done += count
+        now = time.monotonic()
+        if now - self.last_update >= self.interval or self.done == self.total:
+            self.last_update = now
+            self.stream.write(f"\r{self.label}: {self.done}/{self.total}")
+            self.stream.flush()
+
+    def finish(self):
+        if self.total:
+            self.stream.write("\n")
+            self.stream.flush()
+
+
+def normalize_extensions(extensions):
+    # Extensões sempre comparadas em minúsculas e com o ponto inicial (".JPG" e "jpg" viram ".jpg")
+    return frozenset(extension.lower() if extension.startswith('.') else f".{extension.lower()}" for extension in extensions)
+
+
+def has_allowed_extension(file_name, allowed_extensions):
+    return os.path.splitext(file_name)[1].lower() in allowed_extensions
+
+
+def add_move_arguments(parser):
+    # Opções comuns aos subcomandos que movem arquivos
+    parser.add_argument('--dry-run', action='store_true', help='Apenas lista o plano, sem mover nada')
+    parser.add_argument('--journal', type=str, default=None, help='Journal JSONL do plano; uma nova execução com o mesmo journal e as mesmas pastas retoma de onde parou')
+
+
+def add_extension_arguments(parser, default_extensions):
+    parser.add_argument('--extension', action='append', default=None,
+                        help=f"Extensão permitida (pode repetir; padrão: {' '.join(sorted(normalize_extensions(default_extensions)))})")
+
+
+def walk_bottom_up(directory):
+    # Varredura com os.scandir em pós-ordem, sem recursão: cada diretório é lido uma única vez
+    # e entregue como (caminho, entradas) depois de todos os seus subdiretórios
+    stack = [(directory, None)]
+    while stack:
+        path, entries = stack.pop()
+        if entries is not None:
+            yield path, entries
+            continue
+        try:
+            with os.scandir(path) as iterator:
+                entries = list(iterator)
+        except OSError as e:
+            print(f"Erro ao ler o diretório '{path}': {e}")
+            continue
+        stack.append((path, entries))
+        stack.extend((entry.path, None) for entry in entries if entry.is_dir(follow_symlinks=False))
+
+
+class DirectoryPruner:
+    # Guarda quantas entradas restam em cada diretório da origem, contadas na própria varredura do plano,
+    # e remove o diretório assim que a última sai, subindo para o pai. Não faz nenhum listdir extra
+    def __init__(self, root_directory):
+        self.root_directory = root_directory
+        self.remaining = {}
+        self.removed = 0
+
+    def track(self, directory, entry_count):
+        self.remaining[directory] = entry_count
+
+    def entry_removed(self, path):
+        directory = os.path.dirname(path)
+        while directory in self.remaining:
+            self.remaining[directory] -= 1
+            if self.remaining[directory] > 0 or directory == self.root_directory:
+                return
+            if not self._remove(directory):
+                return
+            directory = os.path.dirname(directory)
+
+    def prune_empty(self):
+        # Remove os diretórios que já estavam vazios na varredura; a ordem de registro é de baixo para cima
+        for directory in list(self.remaining):
+            if self.remaining.get(directory) == 0 and directory != self.root_directory and self._remove(directory):
+                self.entry_removed(directory)
+
+    def _remove(self, directory):
+        try:
+            os.rmdir(directory)
+        except OSError:
+            # Algo novo apareceu no diretório depois da varredura: ele fica
+            return False
+        del self.remaining[directory]
+        self.removed += 1
+        return True
+
+    @classmethod
+    def scan(cls, root_directory):
+        pruner = cls(root_directory)
+        for directory, entries in walk_bottom_up(root_directory):
+            pruner.track(directory, len(entries))
+        return pruner
+
+
+def group_moves_by_directory(moves):
+    # Agrupa os pares (origem, destino) pelo diretório de destino, mantendo a ordem do plano
+    moves_by_directory = {}
+    for source_path, destination_path in moves:
+        moves_by_directory.setdefault(os.path.dirname(destination_path), []).append((source_path, destination_path))
+    return moves_by_directory
+
+
+def execute_moves(moves, copy_workers=DEFAULT_COPY_WORKERS, label="Movendo arquivos", journal=None, on_moved=None):
+    # Executa um plano de movimentação já calculado:
+    # cria cada diretório de destino uma única vez, usa os.rename no mesmo sistema de arquivos
+    # e envia as cópias entre dispositivos para um pool de threads limitado.
+    # on_moved(origem, destino), se informado, é chamado na thread principal a cada arquivo movido.
+    # Retorna a lista de pares (origem, destino) movidos com sucesso
+    moves_by_directory = group_moves_by_directory(moves)
+    progress = ProgressCounter(label, len(moves))
+    completed_moves = []
+    cross_device_moves = []
+    errors = []
+
+    def complete(source_path, destination_path):
+        completed_moves.append((source_path, destination_path))
+        if journal is not None:
+            journal.record_done(source_path)
+        if on_moved is not None:
+            on_moved(source_path, destination_path)
+
+    for destination_directory, directory_moves in moves_by_directory.items():
+        try:
+            os.makedirs(destination_directory, exist_ok=True)
+        except OSError as e:
+            errors.extend((source_path, e) for source_path, _ in directory_moves)
+            progress.advance(len(directory_moves))
+            continue
+
+        for source_path, destination_path in directory_moves:
+            try:
+                os.rename(source_path, destination_path)
+            except OSError as e:
+                if e.errno == errno.EXDEV:
+                    cross_device_moves.append((source_path, destination_path))
+                    continue
+                if e.errno == errno.ENOENT and os.path.exists(destination_path) and not os.path.exists(source_path):
+                    # Já movido em uma execução interrompida antes de o journal registrar
+                    complete(source_path, destination_path)
+                else:
+                    errors.append((source_path, e))
+            else:
+                complete(source_path, destination_path)
+            progress.advance()
+
+    if cross_device_moves:
+        with ThreadPoolExecutor(max_workers=copy_workers) as executor:
+            futures = {
+                executor.submit(shutil.move, source_path, destination_path): (source_path, destination_path)
+                for source_path, destination_path in cross_device_moves
+            }
+            for future in as_completed(futures):
+                source_path, destination_path = futures[future]
+                try:
+                    future.result()
+                except OSError as e:
+                    errors.append((source_path, e))
+                else:
+                    complete(source_path, destination_path)
+                progress.advance()
+
+    progress.finish()
+    for source_path, error in errors:
+        print(f"Erro ao processar o arquivo '{os.path.basename(source_path)}': {error}")
+    print(f"{len(completed_moves)} arquivos movidos, {len(errors)} com erro.")
+
+    return completed_moves
+
+
+def journal_parameters(command, source_directory, destination_directory=None, allowed_extensions=None):
+    # Identifica a execução no cabeçalho do journal, para que um journal de outro subcomando ou de outras pastas não seja retomado
+    return {
+        'command': command,
+        'source': os.path.abspath(source_directory),
+        'destination': os.path.abspath(destination_directory) if destination_directory is not None else None,
+        'extensions': sorted(allowed_extensions) if allowed_extensions is not None else None,
+    }
+
+
+def run_planned_moves(plan_moves, journal_path=None, dry_run=False, copy_workers=DEFAULT_COPY_WORKERS, label="Movendo arquivos", on_moved=None,
+                      journal_parameters=None):
+    # Etapa comum de planejamento dos scripts de organização.
+    # plan_moves é chamado só quando não há um plano gravado no journal para retomar.
+    # journal_parameters (ex.: subcomando, origem e destino) fica no cabeçalho do journal: um journal gravado
+    # com outros parâmetros não é retomado
+    journal = MoveJournal(journal_path, journal_parameters) if journal_path and not dry_run else None
+    moves = journal.load_pending_moves() if journal is not None else None
+
+    if moves is not None:
+        print(f"Retomando o plano gravado em '{journal_path}': {len(moves)} arquivos pendentes.")
+        journal.open_for_append()
+    else:
+        moves = plan_moves()
+        if journal is not None:
+            journal.write_plan(moves)
+
+    if dry_run:
+        for source_path, destination_path in moves:
+            print(f"Arquivo '{os.path.basename(source_path)}' seria movido para '{destination_path}'.")
+        print(f"{len(moves)} arquivos seriam movidos (dry-run, nada foi alterado).")
+        return []
+
+    completed_moves = []
+    finished = False
+    try:
+        completed_moves = execute_moves(moves, copy_workers=copy_workers, label=label, journal=journal, on_moved=on_moved)
+        finished = True
+    finally:
+        if journal is not None:
+            # O journal é descartado quando o plano foi percorrido até o fim, mesmo com erros: os arquivos que falharam
+            # já foram reportados e voltam ao plano na próxima varredura, em vez de prender o journal a um plano velho.
+            # Só uma interrupção deixa o journal para ser retomado
+            journal.close(remove=finished)
+    return completed_moves
+
+
+class TestFileMover(unittest.TestCase):
+    def setUp(self):
+        # Origem com alguns arquivos em subpastas e um destino ainda inexistente
+        self.temp_dir = tempfile.mkdtemp()
+        self.source_directory = os.path.join(self.temp_dir, 'origem')
+        self.destination_directory = os.path.join(self.temp_dir, 'destino')
+        self.journal_path = os.path.join(self.temp_dir, 'journal.jsonl')
+        self.moves = []
+        for index in range(4):
+            subdirectory = os.path.join(self.source_directory, f'pasta-{index % 2}')
+            os.makedirs(subdirectory, exist_ok=True)
+            source_path = os.path.join(subdirectory, f'arquivo-{index}.txt')
+            with open(source_path, 'w') as file:
+                file.write(str(index))
+            self.moves.append((source_path, os.path.join(self.destination_directory, f'arquivo-{index}.txt')))
+
+        # Os resumos impressos pelo executor não interessam aos testes
+        stdout_patcher = mock.patch('sys.stdout', new_callable=io.StringIO)
+        stdout_patcher.start()
+        self.addCleanup(stdout_patcher.stop)
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def tree(self):
+        return sorted(
+            os.path.relpath(os.path.join(root, name), self.temp_dir)
+            for root, dirs, files in os.walk(self.temp_dir)
+            for name in dirs + files
+        )
+
+    def test_interrupted_run_resumes_from_journal(self):
+        # Testa se uma execução interrompida no meio retoma do journal sem replanejar e sem mover nada duas vezes
+        real_rename = os.rename
+        renames = []
+
+        def interrupt_on_third_move(source_path, destination_path):
+            if len(renames) == 2:
+                raise KeyboardInterrupt
+            renames.append(source_path)
+            real_rename(source_path, destination_path)
+
+        with mock.patch('os.rename', side_effect=interrupt_on_third_move):
+            with self.assertRaises(KeyboardInterrupt):
+                run_planned_moves(lambda: self.moves, journal_path=self.journal_path)
+        self.assertTrue(os.path.exists(self.journal_path))
+        self.assertEqual(len(MoveJournal(self.journal_path).load_pending_moves()), 2)
+
+        def plan_again():
+            raise AssertionError('o plano gravado no journal deveria ser usado')
+
+        completed_moves = run_planned_moves(plan_again, journal_path=self.journal_path)
+        self.assertEqual(completed_moves, self.moves[2:])
+        self.assertEqual(sorted(os.listdir(self.destination_directory)), [f'arquivo-{index}.txt' for index in range(4)])
+        self.assertFalse(os.path.exists(self.journal_path))
+
+    def test_journal_ignores_truncated_last_line(self):
+        # Testa se uma última linha cortada por uma interrupção é descartada e o restante do journal vale
+        journal = MoveJournal(self.journal_path)
+        journal.write_plan(self.moves)
+        journal.record_done(self.moves[0][0])
+        journal.close()
+        with open(self.journal_path, 'a') as journal_file:
+            journal_file.write('{"type": "done", "sour')
+
+        self.assertEqual(MoveJournal(self.journal_path).load_pending_moves(), self.moves[1:])
+
+    def test_journal_without_planned_marker_is_not_resumed(self):
+        # Testa se um plano gravado pela metade (sem o marcador "planned") é descartado
+        with open(self.journal_path, 'w') as journal_file:
+            journal_file.write(json.dumps({'type': 'header', 'parameters': None}) + '\n')
+            journal_file.write(json.dumps({'type': 'move', 'source': 'a', 'destination': 'b'}) + '\n')
+
+        self.assertIsNone(MoveJournal(self.journal_path).load_pending_moves())
+
+    def test_journal_from_other_parameters_is_not_resumed(self):
+        # Testa se um journal gravado por outra execução (outra origem/destino) é descartado e o plano refeito
+        journal = MoveJournal(self.journal_path, {'command': 'flatten', 'source': 'A', 'destination': 'B'})
+        journal.write_plan(self.moves)
+        journal.close()
+
+        other_moves = self.moves[:1]
+        completed_moves = run_planned_moves(
+            lambda: other_moves,
+            journal_path=self.journal_path,
+            journal_parameters={'command': 'flatten', 'source': 'C', 'destination': 'D'},
+        )
+
+        self.assertEqual(completed_moves, other_moves)
+        self.assertFalse(os.path.exists(self.journal_path))
+
+    def test_failed_moves_do_not_keep_the_journal(self):
+        # Testa se um arquivo que falha sempre (removido à mão) não prende as próximas execuções ao plano velho
+        os.remove(self.moves[0][0])
+
+        completed_moves = run_planned_moves(lambda: self.moves, journal_path=self.journal_path)
+
+        self.assertEqual(completed_moves, self.moves[1:])
+        self.assertFalse(os.path.exists(self.journal_path))
+
+    def test_move_already_done_before_journal_entry_counts_as_completed(self):
+        # Testa o caso em que o arquivo foi movido, mas a interrupção veio antes do "done" ser gravado
+        journal = MoveJournal(self.journal_path)
+        journal.write_plan(self.moves)
+        journal.close()
+        os.makedirs(self.destination_directory)
+        os.rename(*self.moves[0])
+
+        completed_moves = run_planned_moves(lambda: [], journal_path=self.journal_path)
+
+        self.assertEqual(completed_moves, self.moves)
+        self.assertFalse(os.path.exists(self.journal_path))
+
+    def test_dry_run_leaves_tree_unchanged(self):
+        # Testa se o dry-run só lista o plano: nenhum arquivo movido, nenhum diretório e nenhum journal criados
+        tree_before = self.tree()
+
+        completed_moves = run_planned_moves(lambda: self.moves, journal_path=self.journal_path, dry_run=True)
+
+        self.assertEqual(completed_moves, [])
+        self.assertEqual(self.tree(), tree_before)
+
+    def test_pruner_removes_emptied_directories_up_to_root(self):
+        # Testa se cada diretório esvaziado pelos movimentos é removido, subindo pelos pais, mas nunca a raiz
+        nested_directory = os.path.join(self.source_directory, 'a', 'b', 'c')
+        os.makedirs(nested_directory)
+        nested_path = os.path.join(nested_directory, 'foto.txt')
+        with open(nested_path, 'w') as file:
+            file.write('foto')
+        moves = self.moves + [(nested_path, os.path.join(self.destination_directory, 'foto.txt'))]
+        pruner = DirectoryPruner.scan(self.source_directory)
+
+        execute_moves(moves, on_moved=lambda source_path, destination_path: pruner.entry_removed(source_path))
+
+        self.assertEqual(pruner.removed, 5)
+        self.assertTrue(os.path.isdir(self.source_directory))
+        self.assertEqual(os.listdir(self.source_directory), [])
+
+    def test_pruner_keeps_directories_with_remaining_entries(self):
+        # Testa se um diretório com arquivos que não saíram, ou que recebeu um arquivo depois da varredura, fica
+        pruner = DirectoryPruner.scan(self.source_directory)
+        with open(os.path.join(self.source_directory, 'pasta-1', 'novo.txt'), 'w') as file:
+            file.write('novo')
+
+        for source_path, destination_path in self.moves[1:]:
+            os.remove(source_path)
+            pruner.entry_removed(source_path)
+
+        self.assertEqual(pruner.removed, 0)
+        self.assertEqual(self.tree(), ['origem', 'origem/pasta-0', 'origem/pasta-0/arquivo-0.txt', 'origem/pasta-1', 'origem/pasta-1/novo.txt'])
+
+    def test_pruner_removes_directories_that_were_already_empty(self):
+        # Testa se prune_empty remove diretórios vazios desde antes da varredura, inclusive o pai que fica vazio por causa deles
+        os.makedirs(os.path.join(self.source_directory, 'vazia', 'interna'))
+        pruner = DirectoryPruner.scan(self.source_directory)
+
+        pruner.prune_empty()
+
+        self.assertEqual(pruner.removed, 2)
+        self.assertEqual(sorted(os.listdir(self.source_directory)), ['pasta-0', 'pasta-1'])
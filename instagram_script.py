@@ -1,35 +1,311 @@
+import io
 import os
-from PIL import Image, ImageEnhance
+import glob
+import time
+import shutil
+import argparse
+import tempfile
+import unittest
+from unittest import mock
+from functools import partial
+from concurrent.futures import ProcessPoolExecutor
 
-def validate_image_quality(image_path):
+# Extensões aceitas quando a entrada é um diretório
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp', '.gif', '.webp', '.tif', '.tiff')
+
+# Sufixo das imagens geradas; usado também para não reprocessar as próprias saídas
+OUTPUT_SUFFIX = "_insta"
+
+# No resize, reduce() (média por blocos, barata) leva a imagem até REDUCING_GAP vezes o alvo antes do LANCZOS
+REDUCING_GAP = 3.0
+
+
+# Presets de saída (largura, altura), todos gerados a partir de uma única decodificação da imagem
+PRESETS = {
+    'square': (1080, 1080),  # 1:1
+    'portrait': (1080, 1350),  # 4:5
+    'landscape': (1080, 566),  # 1.91:1
+    'story': (1080, 1920),  # 9:16
+}
+
+# Extensão de arquivo de cada formato de saída
+OUTPUT_FORMATS = {
+    'jpeg': '.jpg',
+    'webp': '.webp',
+    'png': '.png',
+}
+
+# Formatos de origem gravados com outro encoder: o Pillow abre muitas fotos de câmera e celular
+# como MPO (JPEG com imagens extras), que deve ser salvo como JPEG para valerem quality e progressive
+SOURCE_ENCODERS = {
+    'mpo': 'jpeg',
+}
+
+
+def validate_image_quality(image):
+    # Checagem barata do cabeçalho: formato reconhecido e dimensões válidas.
+    # A validação completa acontece na decodificação feita por process_image
+    width, height = image.size
+    return image.format is not None and width > 0 and height > 0
+
+
+def cover_box(source_size, target_size):
+    # Recorte central, em coordenadas da imagem de origem, com a mesma proporção do alvo (scale-to-cover)
+    source_width, source_height = source_size
+    target_width, target_height = target_size
+    scale = max(target_width / source_width, target_height / source_height)
+    crop_width = target_width / scale
+    crop_height = target_height / scale
+    left = (source_width - crop_width) / 2
+    top = (source_height - crop_height) / 2
+    return (left, top, left + crop_width, top + crop_height)
+
+
+def draft_size_for(source_size, target_sizes):
+    # Menor tamanho decodificado que ainda cobre todos os presets sem ampliar a imagem
+    source_width, source_height = source_size
+    scale = max(
+        max(target_width / source_width, target_height / source_height)
+        for target_width, target_height in target_sizes
+    )
+    return (int(source_width * scale + 0.5), int(source_height * scale + 0.5))
+
+
+def load_reduced(image, target_size):
+    # Em JPEG, draft() faz o decoder usar a escala DCT (1/2, 1/4 ou 1/8) que ainda deixa os dois lados >= alvo,
+    # então uma foto de 24-48 MP nunca é decodificada em resolução cheia. Nos demais formatos draft() não faz nada
+    image.draft(None, target_size)
+    image.load()
+
+
+def save_options(output_format, quality):
+    if output_format == 'jpeg':
+        return {'quality': quality, 'progressive': True, 'optimize': True}
+    if output_format == 'webp':
+        return {'quality': quality, 'method': 6}
+    if output_format == 'png':
+        return {'optimize': True}
+    return {}
+
+
+def output_path_for(image_path, preset='square', output_format=None):
+    # O preset square mantém o nome original "<nome>_insta"; os demais recebem o nome do preset
+    base_path, extension = os.path.splitext(image_path)
+    if output_format is not None:
+        extension = OUTPUT_FORMATS[output_format]
+    if preset == 'square':
+        return f"{base_path}{OUTPUT_SUFFIX}{extension}"
+    return f"{base_path}{OUTPUT_SUFFIX}_{preset}{extension}"
+
+
+def is_output_path(image_path):
+    base_path = os.path.splitext(image_path)[0]
+    return base_path.endswith(OUTPUT_SUFFIX) or any(base_path.endswith(f"{OUTPUT_SUFFIX}_{preset}") for preset in PRESETS)
+
+
+def process_image(image_path, presets=('square',), output_format=None, quality=90):
+    # Pillow só é importado quando uma imagem é de fato processada (no processo do pool, na primeira imagem)
+    from PIL import Image
+
+    target_sizes = [PRESETS[preset] for preset in presets]
+
+    try:
+        # Abre a imagem uma única vez: Image.open lê só o cabeçalho e load() faz a decodificação real,
+        # que falha se a imagem estiver corrompida ou truncada
+        with Image.open(image_path) as image:
+            if not validate_image_quality(image):
+                print(f"A imagem '{image_path}' é inválida.")
+                return False
+            original_size = image.size
+            load_reduced(image, draft_size_for(original_size, target_sizes))
+
+            # O draft pode ter reduzido a imagem; o recorte é calculado sobre o tamanho decodificado
+            source_format = image.format
+            for preset, target_size in zip(presets, target_sizes):
+                output_image = image.resize(
+                    target_size,
+                    Image.LANCZOS,
+                    box=cover_box(image.size, target_size),
+                    reducing_gap=REDUCING_GAP,
+                )
+
+                encoder_format = output_format or SOURCE_ENCODERS.get(source_format.lower(), source_format.lower())
+                if encoder_format == 'jpeg' and output_image.mode not in ('RGB', 'L'):
+                    output_image = output_image.convert('RGB')
+                output_image.save(
+                    output_path_for(image_path, preset, output_format),
+                    format=encoder_format,
+                    **save_options(encoder_format, quality),
+                )
+    except (IOError, SyntaxError, KeyError):
+        print(f"A imagem '{image_path}' é inválida.")
+        return False
+    except Exception as e:
+        # Qualquer outra falha do Pillow (ex.: DecompressionBombError, ValueError do encoder) fica restrita a esta
+        # imagem; se escapasse do worker, interromperia o executor.map e o lote inteiro, sem resumo
+        print(f"Erro ao processar a imagem '{image_path}': {e}")
+        return False
+
+    return True
+
+
+def is_up_to_date(image_path, presets=('square',), output_format=None):
+    # Todas as saídas já existem e são mais novas que a imagem de origem
     try:
-        image = Image.open(image_path)
-        image.verify()  # Verifica se a imagem está corrompida
-        return True
-    except (IOError, SyntaxError):
+        source_mtime = os.path.getmtime(image_path)
+        return all(
+            os.path.getmtime(output_path_for(image_path, preset, output_format)) >= source_mtime
+            for preset in presets
+        )
+    except OSError:
         return False
 
-def process_image(image_path):
-    if validate_image_quality(image_path):
-        output_path = f"{os.path.splitext(image_path)[0]}_insta{os.path.splitext(image_path)[1]}"
-        target_width = 1080  # Largura desejada para a imagem do Instagram
-        target_height = 1080  # Altura desejada para a imagem do Instagram
-
-        image = Image.open(image_path)
-        image = image.resize((target_width, target_height))
-
-        # Recorte central da imagem mantendo a proporção original
-        width, height = image.size
-        left = (width - target_width) // 2
-        top = (height - target_height) // 2
-        right = left + target_width
-        bottom = top + target_height
-        image = image.crop((left, top, right, bottom))
-
-        image.save(output_path)
-        print("A imagem foi processada com sucesso!")
+
+def find_images(source):
+    # Aceita um diretório (todas as imagens dele) ou um padrão glob
+    if os.path.isdir(source):
+        image_paths = [
+            os.path.join(source, file_name)
+            for file_name in sorted(os.listdir(source))
+            if os.path.splitext(file_name)[1].lower() in IMAGE_EXTENSIONS
+        ]
     else:
-        print("A imagem fornecida é inválida.")
+        image_paths = sorted(glob.glob(source, recursive=True))
+
+    return [
+        image_path
+        for image_path in image_paths
+        if os.path.isfile(image_path) and not is_output_path(image_path)
+    ]
+
+
+def process_images(source, jobs=None, presets=('square',), output_format=None, quality=90):
+    image_paths = find_images(source)
+    pending_paths = [image_path for image_path in image_paths if not is_up_to_date(image_path, presets, output_format)]
+    skipped = len(image_paths) - len(pending_paths)
+
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        process_function = partial(process_image, presets=tuple(presets), output_format=output_format, quality=quality)
+        results = list(executor.map(process_function, pending_paths, chunksize=4))
+    elapsed = time.perf_counter() - start
+
+    processed = sum(results)
+    images_per_second = processed / elapsed if elapsed > 0 else 0.0
+    print(f"{processed} imagens processadas, {len(results) - processed} inválidas e {skipped} já atualizadas "
+          f"em {elapsed:.2f}s ({images_per_second:.1f} imagens/s).")
+    return processed
+
+
+def add_arguments(parser):
+    parser.add_argument('source', type=str, help='Diretório das imagens ou padrão glob (ex.: "fotos/**/*.jpg")')
+    parser.add_argument('--jobs', type=int, default=None, help='Quantidade de processos (padrão: número de CPUs)')
+    parser.add_argument('--preset', action='append', choices=sorted(PRESETS), help='Formato de saída (pode repetir; padrão: square)')
+    parser.add_argument('--format', choices=sorted(OUTPUT_FORMATS), default=None, help='Formato do arquivo gerado (padrão: o mesmo da origem)')
+    parser.add_argument('--quality', type=int, default=90, help='Qualidade do JPEG progressivo / WebP')
+
+
+def run(args):
+    return process_images(args.source, jobs=args.jobs, presets=args.preset or ['square'], output_format=args.format, quality=args.quality)
+
+
+class TestInstagramScript(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        # As mensagens de imagem inválida não interessam aos testes
+        stdout_patcher = mock.patch('sys.stdout', new_callable=io.StringIO)
+        stdout_patcher.start()
+        self.addCleanup(stdout_patcher.stop)
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def write_jpeg(self, size, file_name='foto.jpg'):
+        from PIL import Image
+
+        image_path = os.path.join(self.temp_dir, file_name)
+        Image.new('RGB', size, (200, 100, 50)).save(image_path, format='JPEG')
+        return image_path
+
+    def test_cover_box_crops_center_without_distortion(self):
+        # Testa se o recorte mantém a proporção do alvo e fica centralizado, em origens paisagem e retrato
+        self.assertEqual(cover_box((4000, 3000), (1080, 1080)), (500.0, 0.0, 3500.0, 3000.0))
+        self.assertEqual(cover_box((3000, 4000), (1080, 1080)), (0.0, 500.0, 3000.0, 3500.0))
+        left, top, right, bottom = cover_box((4000, 3000), PRESETS['story'])
+        self.assertAlmostEqual((right - left) / (bottom - top), 1080 / 1920)
+        self.assertEqual(bottom - top, 3000)
+
+    def test_process_image_writes_all_presets(self):
+        # Testa se uma única chamada gera os quatro presets, cada um com o tamanho exato
+        from PIL import Image
+
+        image_path = self.write_jpeg((2000, 1500))
+
+        self.assertTrue(process_image(image_path, presets=tuple(PRESETS)))
+
+        for preset, target_size in PRESETS.items():
+            with Image.open(output_path_for(image_path, preset)) as output_image:
+                self.assertEqual(output_image.size, target_size)
+
+    def test_up_to_date_outputs_are_skipped(self):
+        # Testa se saídas mais novas que a origem são puladas e se as próprias saídas não são tratadas como entrada
+        image_path = self.write_jpeg((1200, 1200))
+        presets = ('square', 'story')
+        self.assertFalse(is_up_to_date(image_path, presets))
+
+        process_image(image_path, presets=presets)
+        self.assertTrue(is_up_to_date(image_path, presets))
+        self.assertFalse(is_up_to_date(image_path, presets, output_format='webp'))
+
+        future_mtime = time.time() + 60
+        os.utime(image_path, (future_mtime, future_mtime))
+        self.assertFalse(is_up_to_date(image_path, presets))
+
+        self.assertTrue(is_output_path(output_path_for(image_path, 'square')))
+        self.assertTrue(is_output_path(output_path_for(image_path, 'story')))
+        self.assertFalse(is_output_path(image_path))
+        self.assertEqual(find_images(self.temp_dir), [image_path])
+
+    def test_truncated_jpeg_is_invalid(self):
+        image_path = self.write_jpeg((1200, 1200))
+        with open(image_path, 'rb') as image_file:
+            content = image_file.read()
+        with open(image_path, 'wb') as image_file:
+            image_file.write(content[:len(content) // 2])
+
+        self.assertFalse(process_image(image_path))
+        self.assertFalse(os.path.exists(output_path_for(image_path)))
+
+    def test_mpo_source_is_saved_as_progressive_jpeg(self):
+        # Testa se uma foto aberta como MPO é gravada com as opções do JPEG (quality e progressive)
+        from PIL import Image
+
+        image_path = os.path.join(self.temp_dir, 'camera.jpg')
+        frames = [Image.new('RGB', (1200, 1200), color) for color in ((200, 100, 50), (50, 100, 200))]
+        frames[0].save(image_path, format='MPO', save_all=True, append_images=frames[1:])
+        with Image.open(image_path) as image:
+            self.assertEqual(image.format, 'MPO')
+
+        self.assertTrue(process_image(image_path))
+
+        with Image.open(output_path_for(image_path)) as output_image:
+            self.assertEqual(output_image.format, 'JPEG')
+            self.assertTrue(output_image.info.get('progressive'))
+
+    def test_pillow_errors_do_not_stop_the_batch(self):
+        # Testa se uma imagem que o Pillow recusa (decompression bomb) só conta como falha e o lote continua
+        from PIL import Image
+
+        bomb_path = self.write_jpeg((1200, 1200), 'grande.jpg')
+        image_path = self.write_jpeg((600, 600), 'pequena.jpg')
+
+        with mock.patch.object(Image, 'MAX_IMAGE_PIXELS', 200_000):
+            self.assertFalse(process_image(bomb_path))
+            self.assertEqual(process_images(self.temp_dir, jobs=1), 1)
+        self.assertTrue(os.path.exists(output_path_for(image_path)))
+
 
-# Diretorio das imagens:
-process_image("")
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Gera versões das imagens no formato do Instagram.')
+    add_arguments(parser)
+    run(parser.parse_args())
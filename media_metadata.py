@@ -0,0 +1,468 @@
+import os
+import io
+import struct
+import shutil
+import sqlite3
+import tempfile
+import unittest
+from unittest import mock
+from datetime import datetime
+
+# Tag EXIF DateTimeOriginal e ponteiro para a sub-IFD EXIF
+EXIF_DATETIME_ORIGINAL = 36867
+EXIF_IFD_POINTER = 0x8769
+
+# Segundos entre 1904-01-01 (época do QuickTime/MP4) e 1970-01-01
+MP4_EPOCH_OFFSET = 2082844800
+
+# A cada quantas gravações o índice é confirmado no disco (commit); uma execução interrompida
+# perde no máximo esse número de datas já lidas
+INDEX_COMMIT_INTERVAL = 500
+
+
+def _parse_exif_date(date_str):
+    try:
+        return datetime.strptime(date_str, "%Y:%m:%d %H:%M:%S")
+    except ValueError:
+        return None
+
+
+def _ifd_entry(tiff, endian, ifd_offset, wanted_tag):
+    # Procura uma tag em uma IFD e devolve (tipo, quantidade, offset_do_valor)
+    if ifd_offset + 2 > len(tiff):
+        return None
+    entry_count = struct.unpack_from(endian + 'H', tiff, ifd_offset)[0]
+    for index in range(entry_count):
+        entry_offset = ifd_offset + 2 + index * 12
+        if entry_offset + 12 > len(tiff):
+            return None
+        tag, value_type, count = struct.unpack_from(endian + 'HHI', tiff, entry_offset)
+        if tag == wanted_tag:
+            return value_type, count, entry_offset + 8
+    return None
+
+
+def exif_datetime_original(tiff):
+    # Lê DateTimeOriginal de um bloco TIFF/EXIF (a partir do cabeçalho II/MM)
+    if tiff[:2] == b'II':
+        endian = '<'
+    elif tiff[:2] == b'MM':
+        endian = '>'
+    else:
+        return None
+
+    try:
+        ifd0_offset = struct.unpack_from(endian + 'I', tiff, 4)[0]
+        exif_pointer = _ifd_entry(tiff, endian, ifd0_offset, EXIF_IFD_POINTER)
+        if exif_pointer is None:
+            return None
+        exif_ifd_offset = struct.unpack_from(endian + 'I', tiff, exif_pointer[2])[0]
+
+        entry = _ifd_entry(tiff, endian, exif_ifd_offset, EXIF_DATETIME_ORIGINAL)
+        if entry is None:
+            return None
+        value_type, count, value_field = entry
+        # Valores ASCII com mais de 4 bytes ficam fora da entrada, no offset indicado
+        value_offset = struct.unpack_from(endian + 'I', tiff, value_field)[0] if count > 4 else value_field
+        raw_value = tiff[value_offset:value_offset + count]
+    except struct.error:
+        return None
+
+    return _parse_exif_date(raw_value.split(b'\x00', 1)[0].decode('ascii', 'ignore'))
+
+
+def read_jpeg_capture_date(file_path):
+    # Percorre apenas os marcadores do cabeçalho até o APP1/Exif; nunca lê os dados da imagem
+    with open(file_path, 'rb') as file:
+        if file.read(2) != b'\xff\xd8':
+            return None
+
+        while True:
+            marker = file.read(2)
+            if len(marker) < 2 or marker[0] != 0xFF:
+                return None
+            if marker[1] == 0xFF:
+                # Byte de preenchimento: o próximo 0xFF é o início do marcador
+                file.seek(-1, os.SEEK_CUR)
+                continue
+            if marker[1] in (0xDA, 0xD9):
+                # Início dos dados da imagem (SOS) ou fim do arquivo: não há EXIF
+                return None
+            if 0xD0 <= marker[1] <= 0xD8 or marker[1] == 0x01:
+                continue
+
+            length_bytes = file.read(2)
+            if len(length_bytes) < 2:
+                return None
+            length = struct.unpack('>H', length_bytes)[0]
+            if marker[1] == 0xE1:
+                segment = file.read(length - 2)
+                if segment.startswith(b'Exif\x00\x00'):
+                    return exif_datetime_original(segment[6:])
+            else:
+                file.seek(length - 2, os.SEEK_CUR)
+
+
+def _iter_boxes(file, start, end):
+    # Itera as caixas ISO BMFF (MP4/MOV/HEIC) entre start e end, devolvendo (tipo, início_do_corpo, fim)
+    position = start
+    while position + 8 <= end:
+        file.seek(position)
+        header = file.read(8)
+        if len(header) < 8:
+            return
+        size, box_type = struct.unpack('>I4s', header)
+        header_size = 8
+        if size == 1:
+            size = struct.unpack('>Q', file.read(8))[0]
+            header_size = 16
+        elif size == 0:
+            size = end - position
+        if size < header_size:
+            return
+        yield box_type, position + header_size, min(position + size, end)
+        position += size
+
+
+def _find_box(file, start, end, wanted_type):
+    for box_type, body_start, box_end in _iter_boxes(file, start, end):
+        if box_type == wanted_type:
+            return body_start, box_end
+    return None
+
+
+def read_mp4_capture_date(file_path):
+    # Lê o creation_time do átomo moov/mvhd, pulando o mdat sem lê-lo
+    with open(file_path, 'rb') as file:
+        file_size = os.fstat(file.fileno()).st_size
+        moov = _find_box(file, 0, file_size, b'moov')
+        if moov is None:
+            return None
+        mvhd = _find_box(file, moov[0], moov[1], b'mvhd')
+        if mvhd is None:
+            return None
+
+        file.seek(mvhd[0])
+        version = file.read(4)[:1]
+        if version == b'\x01':
+            creation_time = struct.unpack('>Q', file.read(8))[0]
+        else:
+            creation_time = struct.unpack('>I', file.read(4))[0]
+
+    if creation_time <= MP4_EPOCH_OFFSET:
+        # Zero (ou anterior a 1970) indica que o arquivo não registrou a data
+        return None
+    try:
+        return datetime.fromtimestamp(creation_time - MP4_EPOCH_OFFSET)
+    except (OverflowError, OSError, ValueError):
+        return None
+
+
+def _read_uint(data, offset, size):
+    if size == 0:
+        return 0, offset
+    return int.from_bytes(data[offset:offset + size], 'big'), offset + size
+
+
+def _heic_exif_location(iinf, iloc):
+    # Encontra o item do tipo 'Exif' em iinf e devolve (offset, tamanho) da primeira extensão em iloc
+    iinf_version = iinf[0]
+    offset = 4
+    if iinf_version == 0:
+        entry_count, offset = _read_uint(iinf, offset, 2)
+    else:
+        entry_count, offset = _read_uint(iinf, offset, 4)
+
+    exif_item_id = None
+    for _ in range(entry_count):
+        if offset + 8 > len(iinf):
+            break
+        infe_size, infe_type = struct.unpack_from('>I4s', iinf, offset)
+        infe_version = iinf[offset + 8]
+        if infe_type == b'infe' and infe_version >= 2:
+            id_size = 2 if infe_version == 2 else 4
+            item_id, type_offset = _read_uint(iinf, offset + 12, id_size)
+            if iinf[type_offset + 2:type_offset + 6] == b'Exif':
+                exif_item_id = item_id
+                break
+        if infe_size < 8:
+            break
+        offset += infe_size
+
+    if exif_item_id is None:
+        return None
+
+    iloc_version = iloc[0]
+    offset_size = iloc[4] >> 4
+    length_size = iloc[4] & 0x0F
+    base_offset_size = iloc[5] >> 4
+    index_size = iloc[5] & 0x0F if iloc_version in (1, 2) else 0
+    offset = 6
+    item_count, offset = _read_uint(iloc, offset, 2 if iloc_version < 2 else 4)
+
+    for _ in range(item_count):
+        item_id, offset = _read_uint(iloc, offset, 2 if iloc_version < 2 else 4)
+        if iloc_version in (1, 2):
+            offset += 2  # construction_method
+        offset += 2  # data_reference_index
+        base_offset, offset = _read_uint(iloc, offset, base_offset_size)
+        extent_count, offset = _read_uint(iloc, offset, 2)
+        extents = []
+        for _ in range(extent_count):
+            _, offset = _read_uint(iloc, offset, index_size)
+            extent_offset, offset = _read_uint(iloc, offset, offset_size)
+            extent_length, offset = _read_uint(iloc, offset, length_size)
+            extents.append((base_offset + extent_offset, extent_length))
+        if item_id == exif_item_id and extents:
+            return extents[0]
+    return None
+
+
+def read_heic_capture_date(file_path):
+    # Lê só a caixa meta (iinf/iloc) e o item Exif que ela aponta
+    with open(file_path, 'rb') as file:
+        file_size = os.fstat(file.fileno()).st_size
+        meta = _find_box(file, 0, file_size, b'meta')
+        if meta is None:
+            return None
+
+        # meta é uma "full box": os 4 primeiros bytes são versão e flags
+        children = {}
+        for box_type, body_start, box_end in _iter_boxes(file, meta[0] + 4, meta[1]):
+            if box_type in (b'iinf', b'iloc'):
+                file.seek(body_start)
+                children[box_type] = file.read(box_end - body_start)
+        if b'iinf' not in children or b'iloc' not in children:
+            return None
+
+        try:
+            location = _heic_exif_location(children[b'iinf'], children[b'iloc'])
+        except (IndexError, struct.error):
+            return None
+        if location is None:
+            return None
+
+        exif_offset, exif_length = location
+        file.seek(exif_offset)
+        exif_item = file.read(exif_length)
+
+    # O item começa com o deslocamento (32 bits) até o cabeçalho TIFF, normalmente após "Exif\0\0"
+    if len(exif_item) < 4:
+        return None
+    tiff_offset = 4 + struct.unpack_from('>I', exif_item)[0]
+    return exif_datetime_original(exif_item[tiff_offset:])
+
+
+# Leitor de data de captura para cada extensão; as demais usam a data do sistema de arquivos
+CAPTURE_DATE_READERS = {
+    '.jpg': read_jpeg_capture_date,
+    '.jpeg': read_jpeg_capture_date,
+    '.heic': read_heic_capture_date,
+    '.heif': read_heic_capture_date,
+    '.mp4': read_mp4_capture_date,
+    '.m4v': read_mp4_capture_date,
+    '.mov': read_mp4_capture_date,
+}
+
+
+def read_capture_date(file_path):
+    reader = CAPTURE_DATE_READERS.get(os.path.splitext(file_path)[1].lower())
+    if reader is None:
+        return None
+    try:
+        return reader(file_path)
+    except (OSError, struct.error, ValueError):
+        return None
+
+
+class MetadataIndex:
+    # Índice SQLite de datas de captura, indexado por caminho + tamanho + mtime,
+    # para que execuções seguintes não releiam arquivos inalterados
+    def __init__(self, index_path):
+        self.connection = sqlite3.connect(index_path)
+        self.connection.execute(
+            'CREATE TABLE IF NOT EXISTS capture_dates ('
+            'path TEXT PRIMARY KEY, size INTEGER NOT NULL, mtime_ns INTEGER NOT NULL, capture_date TEXT)'
+        )
+        self.pending_writes = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def capture_date(self, file_path, stat):
+        row = self.connection.execute(
+            'SELECT size, mtime_ns, capture_date FROM capture_dates WHERE path = ?', (file_path,)
+        ).fetchone()
+        if row is not None and row[0] == stat.st_size and row[1] == stat.st_mtime_ns:
+            return datetime.fromisoformat(row[2]) if row[2] else None
+
+        capture_date = read_capture_date(file_path)
+        self.connection.execute(
+            'INSERT OR REPLACE INTO capture_dates (path, size, mtime_ns, capture_date) VALUES (?, ?, ?, ?)',
+            (file_path, stat.st_size, stat.st_mtime_ns, capture_date.isoformat() if capture_date else None),
+        )
+        self._written()
+        return capture_date
+
+    def move(self, source_path, destination_path):
+        # Mover preserva tamanho e mtime, então a entrada continua válida no novo caminho
+        self.connection.execute('DELETE FROM capture_dates WHERE path = ?', (destination_path,))
+        self.connection.execute('UPDATE capture_dates SET path = ? WHERE path = ?', (destination_path, source_path))
+        self._written()
+
+    def _written(self):
+        self.pending_writes += 1
+        if self.pending_writes >= INDEX_COMMIT_INTERVAL:
+            self.connection.commit()
+            self.pending_writes = 0
+
+    def close(self):
+        self.connection.commit()
+        self.connection.close()
+
+
+def _box(box_type, body):
+    return struct.pack('>I4s', 8 + len(body), box_type) + body
+
+
+class TestMediaMetadata(unittest.TestCase):
+    capture_date = datetime(2019, 5, 17, 10, 11, 12)
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def exif_bytes(self, endian):
+        # Bloco "Exif\0\0" + TIFF gerado pelo Pillow, com DateTimeOriginal na sub-IFD EXIF
+        try:
+            from PIL import Image
+        except ImportError:
+            raise unittest.SkipTest('Pillow não está instalado')
+        exif = Image.Exif()
+        exif.endian = endian
+        exif.get_ifd(EXIF_IFD_POINTER)[EXIF_DATETIME_ORIGINAL] = self.capture_date.strftime('%Y:%m:%d %H:%M:%S')
+        return exif.tobytes()
+
+    def write_jpeg(self, file_name, endian='<', with_exif=True):
+        from PIL import Image
+
+        exif = self.exif_bytes(endian) if with_exif else None
+        buffer = io.BytesIO()
+        Image.new('RGB', (16, 16), 'red').save(buffer, 'JPEG', **({'exif': exif} if exif else {}))
+        file_path = os.path.join(self.temp_dir, file_name)
+        with open(file_path, 'wb') as file:
+            file.write(buffer.getvalue())
+        return file_path
+
+    def write_file(self, file_name, content):
+        file_path = os.path.join(self.temp_dir, file_name)
+        with open(file_path, 'wb') as file:
+            file.write(content)
+        return file_path
+
+    def test_jpeg_exif_in_both_byte_orders(self):
+        # Testa a leitura do DateTimeOriginal em EXIF little-endian (II) e big-endian (MM)
+        for endian in ('<', '>'):
+            file_path = self.write_jpeg(f'foto{"LE" if endian == "<" else "BE"}.jpg', endian)
+            self.assertEqual(read_capture_date(file_path), self.capture_date)
+
+        self.assertIsNone(read_capture_date(self.write_jpeg('sem_exif.jpg', with_exif=False)))
+
+    def test_jpeg_skips_xmp_app1_before_exif(self):
+        # Testa se um APP1 de XMP antes do APP1 Exif é pulado em vez de interromper a busca
+        with open(self.write_jpeg('original.jpg'), 'rb') as file:
+            jpeg = file.read()
+        xmp = b'http://ns.adobe.com/xap/1.0/\x00<x:xmpmeta xmlns:x="adobe:ns:meta/"/>'
+        xmp_segment = b'\xff\xe1' + struct.pack('>H', len(xmp) + 2) + xmp
+        file_path = self.write_file('xmp.jpg', jpeg[:2] + xmp_segment + jpeg[2:])
+
+        self.assertEqual(read_capture_date(file_path), self.capture_date)
+
+    def test_mp4_mvhd_versions(self):
+        # Testa o creation_time do mvhd nas versões 0 (32 bits) e 1 (64 bits), com o mdat antes do moov
+        creation_time = int(self.capture_date.timestamp()) + MP4_EPOCH_OFFSET
+        mvhd_bodies = {
+            'v0.mp4': b'\x00\x00\x00\x00' + struct.pack('>II', creation_time, 0) + b'\x00' * 80,
+            'v1.mov': b'\x01\x00\x00\x00' + struct.pack('>QQ', creation_time, 0) + b'\x00' * 80,
+            'sem_data.mp4': b'\x00\x00\x00\x00' + struct.pack('>II', 0, 0) + b'\x00' * 80,
+        }
+        for file_name, mvhd_body in mvhd_bodies.items():
+            content = _box(b'ftyp', b'isom\x00\x00\x00\x00') + _box(b'mdat', b'\x00' * 1000) + _box(b'moov', _box(b'mvhd', mvhd_body))
+            expected = None if file_name == 'sem_data.mp4' else self.capture_date
+            self.assertEqual(read_capture_date(self.write_file(file_name, content)), expected)
+
+    def test_metadata_index_commits_periodically(self):
+        # Testa se as datas já lidas sobrevivem a uma interrupção sem close(), até o último commit periódico
+        file_paths = [self.write_jpeg(f'foto-{index}.jpg') for index in range(3)]
+        index_path = os.path.join(self.temp_dir, 'index.sqlite')
+
+        with mock.patch(f'{__name__}.INDEX_COMMIT_INTERVAL', 2):
+            metadata_index = MetadataIndex(index_path)
+            for file_path in file_paths:
+                metadata_index.capture_date(file_path, os.stat(file_path))
+
+            # Outra conexão só enxerga o que foi confirmado: as duas primeiras datas, não a terceira
+            connection = sqlite3.connect(index_path)
+            committed_rows = connection.execute('SELECT COUNT(*) FROM capture_dates').fetchone()[0]
+            connection.close()
+            metadata_index.connection.close()
+
+        self.assertEqual(committed_rows, 2)
+
+    def test_heic_exif_item(self):
+        # Testa a leitura do item Exif de um HEIC: meta/iinf aponta o item e meta/iloc a sua posição no arquivo
+        exif_item = struct.pack('>I', 6) + self.exif_bytes('>')
+        item_infos = (
+            _box(b'infe', b'\x02\x00\x00\x00' + struct.pack('>HH', 1, 0) + b'hvc1\x00')
+            + _box(b'infe', b'\x02\x00\x00\x00' + struct.pack('>HH', 2, 0) + b'Exif\x00')
+        )
+        iinf = _box(b'iinf', b'\x00\x00\x00\x00' + struct.pack('>H', 2) + item_infos)
+
+        def build(exif_offset):
+            # iloc versão 1: offset e length de 4 bytes, sem base_offset; um extent por item
+            iloc = _box(b'iloc', b'\x01\x00\x00\x00' + b'\x44\x00' + struct.pack('>H', 2)
+                        + struct.pack('>HHHH', 1, 0, 0, 1) + struct.pack('>II', 0, 0)
+                        + struct.pack('>HHHH', 2, 0, 0, 1) + struct.pack('>II', exif_offset, len(exif_item)))
+            meta = _box(b'meta', b'\x00\x00\x00\x00' + _box(b'hdlr', b'\x00' * 24) + iinf + iloc)
+            return _box(b'ftyp', b'heic\x00\x00\x00\x00') + meta
+
+        header = build(0)
+        file_path = self.write_file('foto.heic', build(len(header) + 8) + _box(b'mdat', exif_item))
+
+        self.assertEqual(read_capture_date(file_path), self.capture_date)
+
+    def test_metadata_index_hits_and_misses(self):
+        # Testa se o índice reaproveita a data enquanto tamanho e mtime não mudam e relê o arquivo quando mudam
+        file_path = self.write_jpeg('foto.jpg')
+        index_path = os.path.join(self.temp_dir, 'index.sqlite')
+
+        with mock.patch(f'{__name__}.read_capture_date', wraps=read_capture_date) as reader:
+            with MetadataIndex(index_path) as metadata_index:
+                self.assertEqual(metadata_index.capture_date(file_path, os.stat(file_path)), self.capture_date)
+                self.assertEqual(metadata_index.capture_date(file_path, os.stat(file_path)), self.capture_date)
+                self.assertEqual(reader.call_count, 1)
+
+                stat = os.stat(file_path)
+                os.utime(file_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+                metadata_index.capture_date(file_path, os.stat(file_path))
+                self.assertEqual(reader.call_count, 2)
+
+                with open(file_path, 'ab') as file:
+                    file.write(b'\x00')
+                metadata_index.capture_date(file_path, os.stat(file_path))
+                self.assertEqual(reader.call_count, 3)
+
+                # Mover preserva a entrada no novo caminho
+                moved_path = os.path.join(self.temp_dir, 'movida.jpg')
+                os.rename(file_path, moved_path)
+                metadata_index.move(file_path, moved_path)
+
+            # Um índice reaberto continua valendo entre execuções
+            with MetadataIndex(index_path) as metadata_index:
+                self.assertEqual(metadata_index.capture_date(moved_path, os.stat(moved_path)), self.capture_date)
+            self.assertEqual(reader.call_count, 3)
@@ -1,34 +1,49 @@
 import os
-import shutil
+import argparse
 
-def move_json_files(source_directory):
+from file_mover import add_move_arguments, journal_parameters, run_planned_moves, walk_bottom_up
+
+
+def planejar_json_files(source_directory):
+    # Cada JSON vai para a pasta "<nome da subpasta>_jsons" na raiz do diretório de origem
+    moves = []
+    for root, entries in walk_bottom_up(source_directory):
+        for entry in entries:
+            if entry.is_file() and entry.name.lower().endswith('.json'):
+                dir_name = os.path.basename(root)
+                destination_directory = os.path.join(source_directory, dir_name + "_jsons")
+                destination_file_path = os.path.join(destination_directory, entry.name)
+                moves.append((entry.path, destination_file_path))
+    return moves
+
+
+def move_json_files(source_directory, journal_path=None, dry_run=False):
     # Verifica se o diretório de origem existe
     if not os.path.exists(source_directory):
         print("O diretório de origem não existe.")
         return
 
-    # Percorre todas as subpastas e arquivos no diretório de origem
-    for root, dirs, files in os.walk(source_directory):
-        for file in files:
-            if file.lower().endswith('.json'):
-                source_file_path = os.path.join(root, file)
-                dir_name = os.path.basename(root)
-                destination_directory = os.path.join(source_directory, dir_name + "_jsons")
+    # Planeja todos os movimentos antes de mover; as pastas de destino são criadas uma única vez pelo executor
+    run_planned_moves(
+        lambda: planejar_json_files(source_directory),
+        journal_path=journal_path,
+        dry_run=dry_run,
+        journal_parameters=journal_parameters('move-jsons', source_directory),
+    )
 
-                # Verifica se a pasta de destino existe. Se não, cria.
-                if not os.path.exists(destination_directory):
-                    os.makedirs(destination_directory)
+    print("Movimento de arquivos concluído.")
 
-                destination_file_path = os.path.join(destination_directory, file)
 
-                # Move o arquivo JSON para a pasta de destino
-                shutil.move(source_file_path, destination_file_path)
+def add_arguments(parser):
+    parser.add_argument('source_directory', type=str, help='Diretório de origem; cada subpasta ganha uma pasta "<nome>_jsons"')
+    add_move_arguments(parser)
 
-                print(f"Arquivo '{file}' movido para '{destination_file_path}'.")
 
-    print("Movimento de arquivos concluído.")
+def run(args):
+    move_json_files(args.source_directory, journal_path=args.journal, dry_run=args.dry_run)
 
 
-# Exemplo de uso
-source_directory = ""  # Insira o caminho do diretório de origem aqui
-move_json_files(source_directory)
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Move os arquivos JSON de cada subpasta para uma pasta "<nome>_jsons".')
+    add_arguments(parser)
+    run(parser.parse_args())
@@ -1,49 +1,42 @@
 import os
-import shutil
+import argparse
+from contextlib import nullcontext
 from datetime import datetime
-from PIL import Image
 
+from file_mover import add_extension_arguments, add_move_arguments, has_allowed_extension, journal_parameters, normalize_extensions, run_planned_moves
+from media_metadata import MetadataIndex, read_capture_date
 
-def obter_data_registro_imagem(file_path):
-    try:
-        with Image.open(file_path) as img:
-            exif_data = img._getexif()
-            if exif_data and 36867 in exif_data:
-                date_str = exif_data[36867]
-                date = datetime.strptime(date_str, "%Y:%m:%d %H:%M:%S")
-                return date
-    except (IOError, AttributeError, KeyError, ValueError):
-        pass
+DEFAULT_ALLOWED_EXTENSIONS = ['.jpg', '.bmp', '.html', '.m4v', '.JPG', '.jpeg', '.png', '.gif', '.json', '.mp4', '.avi', '.tar', '.MOV', '.heic', '.mov', '.ico', '.webp', '.wmv']
 
-    return None
 
+def obter_data_registro_imagem(file_path):
+    # Lê a data de captura só do cabeçalho (EXIF do JPEG/HEIC ou mvhd do MP4/MOV), conforme a extensão
+    return read_capture_date(file_path)
 
-def organizar_arquivos(source_directory, destination_directory, allowed_extensions):
-    # Verifica se a pasta de origem existe
-    if not os.path.exists(source_directory):
-        print("A pasta de origem não existe.")
-        return
 
-    # Verifica se a pasta de destino existe. Se não, cria.
-    if not os.path.exists(destination_directory):
-        os.makedirs(destination_directory)
+def planejar_organizacao(source_directory, destination_directory, allowed_extensions, metadata_index=None):
+    # Calcula o destino (ano/mês/dia) de cada arquivo sem mover nada
+    moves = []
+    with os.scandir(source_directory) as entries:
+        for entry in entries:
+            file_name = entry.name
+            source_file_path = entry.path
 
-    # Percorre todos os arquivos na pasta de origem
-    for file_name in os.listdir(source_directory):
-        source_file_path = os.path.join(source_directory, file_name)
+            # Verifica se é um arquivo
+            if not entry.is_file():
+                print(f"O item '{file_name}' não é um arquivo.")
+                continue
 
-        # Verifica se é um arquivo
-        if os.path.isfile(source_file_path):
             try:
-                # Verifica a extensão do arquivo
-                file_extension = os.path.splitext(file_name)[1].lower()
-
                 # Verifica se a extensão está na lista de extensões permitidas
-                if file_extension in allowed_extensions:
-                    # Obtém a data de registro da imagem ou a data de criação do arquivo
-                    creation_time = os.path.getctime(source_file_path)
-                    creation_date = datetime.fromtimestamp(creation_time)
-                    image_date = obter_data_registro_imagem(source_file_path)
+                if has_allowed_extension(file_name, allowed_extensions):
+                    # Obtém a data de registro da imagem ou a data de criação do arquivo, com um único stat
+                    stat = entry.stat()
+                    creation_date = datetime.fromtimestamp(stat.st_ctime)
+                    if metadata_index is not None:
+                        image_date = metadata_index.capture_date(source_file_path, stat)
+                    else:
+                        image_date = obter_data_registro_imagem(source_file_path)
 
                     # Se a data de registro da imagem estiver disponível, usa-a; caso contrário, usa a data de criação
                     if image_date:
@@ -57,26 +50,61 @@ def organizar_arquivos(source_directory, destination_directory, allowed_extensio
 
                     # Cria o caminho de destino com base no ano, mês e dia
                     destination_path = os.path.join(destination_directory, year, month, day)
-
-                    # Verifica se a pasta de destino existe. Se não, cria.
-                    if not os.path.exists(destination_path):
-                        os.makedirs(destination_path)
-
-                    # Move o arquivo para a pasta de destino
-                    destination_file_path = os.path.join(destination_path, file_name)
-                    shutil.move(source_file_path, destination_file_path)
-
-                    print(f"Arquivo '{file_name}' movido para '{destination_file_path}'.")
+                    moves.append((source_file_path, os.path.join(destination_path, file_name)))
 
             except OSError:
                 print(f"Erro ao processar o arquivo '{file_name}'.")
 
-        else:
-            print(f"O item '{file_name}' não é um arquivo.")
+    return moves
 
 
-source_directory = ""  # Insira o caminho do diretório de origem aqui
-destination_directory = ""  # Insira o caminho do diretório de destino aqui
-allowed_extensions = ['.jpg', '.bmp', '.html', '.m4v', '.JPG', '.jpeg', '.png', '.gif', '.json', '.mp4', '.avi', '.tar', '.MOV', '.heic', '.mov', '.ico', '.webp', '.wmv']
+def organizar_arquivos(source_directory, destination_directory, allowed_extensions, metadata_index_path=None,
+                       journal_path=None, dry_run=False):
+    # Verifica se a pasta de origem existe
+    if not os.path.exists(source_directory):
+        print("A pasta de origem não existe.")
+        return
+
+    # Verifica se a pasta de destino existe. Se não, cria.
+    if not dry_run and not os.path.exists(destination_directory):
+        os.makedirs(destination_directory)
 
-organizar_arquivos(source_directory, destination_directory, allowed_extensions)
\ No newline at end of file
+    # Índice opcional das datas já lidas, para não reler arquivos inalterados em novas execuções.
+    # No dry-run ele não é aberto: nada, nem o índice, é criado ou alterado
+    with (MetadataIndex(metadata_index_path) if metadata_index_path and not dry_run else nullcontext()) as metadata_index:
+        # Planeja todas as movimentações antes de mover qualquer arquivo; com journal, uma nova execução retoma o plano
+        completed_moves = run_planned_moves(
+            lambda: planejar_organizacao(source_directory, destination_directory, allowed_extensions, metadata_index),
+            journal_path=journal_path,
+            dry_run=dry_run,
+            journal_parameters=journal_parameters('organize-by-date', source_directory, destination_directory, allowed_extensions),
+        )
+
+        if metadata_index is not None:
+            for source_file_path, destination_file_path in completed_moves:
+                metadata_index.move(source_file_path, destination_file_path)
+
+
+def add_arguments(parser):
+    parser.add_argument('source_directory', type=str, help='Diretório com as fotos e vídeos')
+    parser.add_argument('destination_directory', type=str, help='Diretório onde as pastas ano/mês/dia serão criadas')
+    parser.add_argument('--metadata-index', type=str, default=None, help='Arquivo SQLite para guardar as datas já lidas')
+    add_extension_arguments(parser, DEFAULT_ALLOWED_EXTENSIONS)
+    add_move_arguments(parser)
+
+
+def run(args):
+    organizar_arquivos(
+        args.source_directory,
+        args.destination_directory,
+        normalize_extensions(args.extension or DEFAULT_ALLOWED_EXTENSIONS),
+        metadata_index_path=args.metadata_index,
+        journal_path=args.journal,
+        dry_run=args.dry_run,
+    )
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Organiza fotos e vídeos em pastas ano/mês/dia pela data de captura.')
+    add_arguments(parser)
+    run(parser.parse_args())
@@ -1,58 +1,241 @@
 import os
-import glob
-import shutil
-
-source_directory = ""  # Insira o caminho do diretório de origem aqui
-destination_directory = ""  # Insira o caminho do diretório de destino aqui
-allowed_extensions = ['.jpg', '.bmp', '.html', '.m4v', '.JPG', '.jpeg', '.png', '.gif', '.json', '.mp4', '.avi', '.tar', '.MOV', '.heic', '.mov', '.ico', '.webp', '.wmv', '.mp4']
-
-# Verifica se a pasta de origem existe
-if not os.path.exists(source_directory):
-    print("A pasta de origem não existe.")
-    exit()
-
-# Obtém todos os caminhos de arquivo nas subpastas
-file_paths = glob.glob(os.path.join(source_directory, "**/*"), recursive=True)
-
-# Verifica se existem arquivos na pasta de origem
-if len(file_paths) == 0:
-    print("Não há arquivos na pasta de origem.")
-    exit()
-
-# Verifica se a pasta de destino existe. Se não, cria.
-if not os.path.exists(destination_directory):
-    os.makedirs(destination_directory)
-
-# Conjunto para armazenar os nomes de arquivo já movidos
-moved_files = set()
-
-# Percorre todas as subpastas e move os arquivos para o destino
-for root, dirs, files in os.walk(source_directory):
-    for file in files:
-        source_file_path = os.path.join(root, file)
-        destination_file_path = os.path.join(destination_directory, file)
-        file_extension = os.path.splitext(file)[1].lower()
-        
-        # Verifica se o arquivo já foi movido, se tem a extensão desejada e se não existe um arquivo com o mesmo nome e extensão no destino
-        if file not in moved_files and file_extension in allowed_extensions:
-            if os.path.exists(destination_file_path):
-                new_filename = f"repet_{file}"
-                destination_file_path = os.path.join(destination_directory, new_filename)
-            shutil.move(source_file_path, destination_file_path)
-            moved_files.add(file)
-
-            # Verifica se o arquivo é um .zip e o descompacta
-            if file_extension == '.zip':
-                with zipfile.ZipFile(destination_file_path, 'r') as zip_ref:
-                    zip_ref.extractall(destination_directory)
-
-print("Movimento de arquivos concluído.")
-
-# Remove pastas vazias no diretório source_directory
-for root, dirs, files in os.walk(source_directory, topdown=False):
-    for directory in dirs:
-        directory_path = os.path.join(root, directory)
-        if not os.listdir(directory_path):
-            os.rmdir(directory_path)
-
-print("Remoção de pastas vazias concluída.")
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from file_archives import extract_archive, is_archive
+from file_dedup import find_identical_files, unique_file_name
+from file_mover import (
+    DirectoryPruner,
+    add_extension_arguments,
+    add_move_arguments,
+    has_allowed_extension,
+    journal_parameters,
+    normalize_extensions,
+    run_planned_moves,
+    walk_bottom_up,
+)
+
+# Arquivos compactados extraídos em paralelo, enquanto os demais arquivos são movidos
+DEFAULT_ARCHIVE_WORKERS = 4
+
+# Ação para arquivos idênticos: 'skip' (deixa na origem), 'delete' ou 'hardlink'
+DUPLICATE_ACTIONS = ('skip', 'delete', 'hardlink')
+
+DEFAULT_ALLOWED_EXTENSIONS = ['.jpg', '.bmp', '.html', '.m4v', '.JPG', '.jpeg', '.png', '.gif', '.json', '.mp4', '.avi', '.tar', '.MOV', '.heic', '.mov', '.ico', '.webp', '.wmv', '.mp4']
+
+
+def listar_destino(destination_directory):
+    # Arquivos que já estão no destino (plano, sem subpastas) como pares (caminho, tamanho)
+    try:
+        with os.scandir(destination_directory) as entries:
+            return [(entry.path, entry.stat().st_size) for entry in entries if entry.is_file()]
+    except FileNotFoundError:
+        return []
+
+
+def planejar_movimentacao(source_directory, destination_directory, allowed_extensions, extract_archives=True, pruner=None):
+    # Retorna (movimentos, duplicados, compactados): duplicados são pares (arquivo_duplicado, arquivo_mantido)
+    # com conteúdo idêntico, que não precisam ser copiados para o destino; compactados são os .zip/.tar(.gz)
+    # que vão para a etapa de extração em vez de serem movidos.
+    # Se um DirectoryPruner for informado, a mesma varredura registra quantas entradas há em cada diretório
+    existing_files = listar_destino(destination_directory)
+    candidates = []
+    archives = []
+
+    # Percorre todas as subpastas (uma única varredura, de baixo para cima) e coleta os arquivos com a extensão desejada
+    for root, entries in walk_bottom_up(source_directory):
+        if pruner is not None:
+            pruner.track(root, len(entries))
+        for entry in entries:
+            if not entry.is_file():
+                continue
+            if extract_archives and is_archive(entry.name):
+                archives.append(entry.path)
+            elif has_allowed_extension(entry.name, allowed_extensions):
+                try:
+                    candidates.append((entry.path, entry.stat().st_size))
+                except OSError as e:
+                    print(f"Erro ao processar o arquivo '{entry.name}': {e}")
+
+    # Arquivos já no destino vêm primeiro, para que sejam eles os mantidos
+    kept_by_duplicate = {}
+    candidate_paths = {file_path for file_path, _ in candidates}
+    for identical_files in find_identical_files(existing_files + candidates, candidate_paths):
+        for duplicate_path in identical_files[1:]:
+            kept_by_duplicate[duplicate_path] = identical_files[0]
+
+    # Nomes repetidos com conteúdo diferente recebem um nome único em vez de ficarem para trás
+    used_names = {os.path.basename(file_path) for file_path, _ in existing_files}
+    moves = []
+    duplicates = []
+    for source_file_path, _ in candidates:
+        if source_file_path in kept_by_duplicate:
+            duplicates.append((source_file_path, kept_by_duplicate[source_file_path]))
+            continue
+        file_name = unique_file_name(os.path.basename(source_file_path), used_names)
+        moves.append((source_file_path, os.path.join(destination_directory, file_name)))
+
+    return moves, duplicates, archives
+
+
+def tratar_duplicados(duplicates, completed_moves, destination_directory, duplicate_action, dry_run=False, on_removed=None):
+    # duplicate_action: 'skip' deixa o duplicado na origem, 'delete' o remove
+    # e 'hardlink' o remove e recria seu nome no destino como hard link do arquivo mantido
+    if duplicate_action == 'skip' or not duplicates:
+        print(f"{len(duplicates)} arquivos duplicados ignorados.")
+        return
+
+    # Onde cada arquivo mantido está agora: já estava no destino ou acabou de ser movido
+    kept_destinations = dict(completed_moves)
+    used_names = set(os.listdir(destination_directory)) if os.path.isdir(destination_directory) else set()
+    handled = 0
+    for duplicate_path, kept_path in duplicates:
+        kept_destination = kept_destinations.get(kept_path, kept_path)
+        if not dry_run and not os.path.exists(kept_destination):
+            # O arquivo mantido não foi movido (erro ou plano retomado); o duplicado fica na origem
+            continue
+
+        if dry_run:
+            print(f"Arquivo '{os.path.basename(duplicate_path)}' é idêntico a '{kept_destination}' e seria removido.")
+            continue
+
+        try:
+            if duplicate_action == 'hardlink':
+                duplicate_name = os.path.basename(duplicate_path)
+                if duplicate_name != os.path.basename(kept_destination):
+                    link_name = unique_file_name(duplicate_name, used_names)
+                    os.link(kept_destination, os.path.join(destination_directory, link_name))
+            os.remove(duplicate_path)
+        except OSError as e:
+            print(f"Erro ao processar o arquivo '{os.path.basename(duplicate_path)}': {e}")
+        else:
+            handled += 1
+            if on_removed is not None:
+                on_removed(duplicate_path)
+
+    if not dry_run:
+        print(f"{handled} arquivos duplicados tratados ({duplicate_action}).")
+
+
+def mover_arquivos_e_remover_pastas(source_directory, destination_directory, allowed_extensions, journal_path=None, dry_run=False, duplicate_action='skip',
+                                    extract_archives=True, delete_archives=False, archive_workers=DEFAULT_ARCHIVE_WORKERS):
+    # Verifica se a pasta de origem existe
+    if not os.path.exists(source_directory):
+        print("A pasta de origem não existe.")
+        return
+
+    # Verifica se existem arquivos na pasta de origem (basta a primeira entrada)
+    with os.scandir(source_directory) as entries:
+        if next(entries, None) is None:
+            print("Não há arquivos na pasta de origem.")
+            return
+
+    # Verifica se a pasta de destino existe. Se não, cria.
+    if not dry_run and not os.path.exists(destination_directory):
+        os.makedirs(destination_directory)
+
+    # Planeja todos os movimentos antes de mover; com journal, uma nova execução retoma o plano.
+    # Duplicados e compactados não vão para o journal: ao retomar, eles ficam para a próxima execução completa
+    duplicates = []
+    archive_futures = []
+    used_names = set()
+    names_lock = threading.Lock()
+
+    # Diretórios esvaziados são removidos assim que a última entrada sai
+    source_directory = os.path.normpath(source_directory)
+    pruner = DirectoryPruner(source_directory)
+
+    def arquivo_removido(source_file_path, destination_file_path=None):
+        if not dry_run:
+            pruner.entry_removed(source_file_path)
+
+    def reservar_nome(file_name):
+        # Chamado pelas threads de extração; os nomes dos movimentos planejados já estão reservados
+        with names_lock:
+            return unique_file_name(file_name, used_names)
+
+    with ThreadPoolExecutor(max_workers=archive_workers) as executor:
+        def planejar():
+            moves, planned_duplicates, archives = planejar_movimentacao(source_directory, destination_directory, allowed_extensions, extract_archives, pruner)
+            duplicates.extend(planned_duplicates)
+            if dry_run:
+                for archive_path in archives:
+                    print(f"Arquivo compactado '{os.path.basename(archive_path)}' seria extraído para '{destination_directory}'.")
+                return moves
+
+            # A extração começa assim que o plano fica pronto e corre junto com os movimentos
+            used_names.update(os.listdir(destination_directory))
+            used_names.update(os.path.basename(destination_file_path) for _, destination_file_path in moves)
+            for archive_path in archives:
+                future = executor.submit(extract_archive, archive_path, destination_directory, allowed_extensions, reservar_nome)
+                archive_futures.append((archive_path, future))
+            return moves
+
+        completed_moves = run_planned_moves(
+            planejar,
+            journal_path=journal_path,
+            dry_run=dry_run,
+            on_moved=arquivo_removido,
+            journal_parameters=journal_parameters('flatten', source_directory, destination_directory, allowed_extensions),
+        )
+
+        extracted_files = 0
+        for archive_path, future in archive_futures:
+            extracted, verified = future.result()
+            extracted_files += extracted
+            if not delete_archives:
+                continue
+            if verified:
+                os.remove(archive_path)
+                arquivo_removido(archive_path)
+            else:
+                print(f"Arquivo compactado '{os.path.basename(archive_path)}' mantido: nem todos os membros foram extraídos.")
+        if archive_futures:
+            print(f"{extracted_files} arquivos extraídos de {len(archive_futures)} arquivos compactados.")
+
+    tratar_duplicados(duplicates, completed_moves, destination_directory, duplicate_action, dry_run, arquivo_removido)
+
+    print("Movimento de arquivos concluído.")
+
+    if dry_run:
+        return
+
+    # Os diretórios esvaziados já foram removidos; falta os que já estavam vazios.
+    # Ao retomar um journal não houve varredura do plano, então a contagem é feita agora, em uma única passada
+    if not pruner.remaining:
+        pruner = DirectoryPruner.scan(source_directory)
+    pruner.prune_empty()
+
+    print(f"Remoção de pastas vazias concluída ({pruner.removed} pastas removidas).")
+
+
+def add_arguments(parser):
+    parser.add_argument('source_directory', type=str, help='Diretório de origem; todas as subpastas são percorridas')
+    parser.add_argument('destination_directory', type=str, help='Diretório único para onde os arquivos são movidos')
+    parser.add_argument('--duplicates', choices=DUPLICATE_ACTIONS, default='skip', help='O que fazer com arquivos de conteúdo idêntico (padrão: skip)')
+    parser.add_argument('--no-extract-archives', action='store_true', help='Não extrair os .zip/.tar(.gz) da origem')
+    parser.add_argument('--delete-archives', action='store_true', help='Remove cada compactado depois que todos os membros foram extraídos e conferidos')
+    parser.add_argument('--archive-workers', type=int, default=DEFAULT_ARCHIVE_WORKERS, help='Compactados extraídos em paralelo')
+    add_extension_arguments(parser, DEFAULT_ALLOWED_EXTENSIONS)
+    add_move_arguments(parser)
+
+
+def run(args):
+    mover_arquivos_e_remover_pastas(
+        args.source_directory,
+        args.destination_directory,
+        normalize_extensions(args.extension or DEFAULT_ALLOWED_EXTENSIONS),
+        journal_path=args.journal,
+        dry_run=args.dry_run,
+        duplicate_action=args.duplicates,
+        extract_archives=not args.no_extract_archives,
+        delete_archives=args.delete_archives,
+        archive_workers=args.archive_workers,
+    )
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Move os arquivos de todas as subpastas para um único diretório e remove as pastas vazias.')
+    add_arguments(parser)
+    run(parser.parse_args())
@@ -1,35 +1,33 @@
 import os
-import shutil
+import argparse
 from datetime import datetime
 
+from file_mover import add_extension_arguments, add_move_arguments, has_allowed_extension, journal_parameters, normalize_extensions, run_planned_moves
+
+DEFAULT_ALLOWED_EXTENSIONS = ['.jpg', '.bmp', '.html', '.m4v', '.JPG', '.jpeg', '.png', '.gif', '.json', '.mp4', '.avi', '.tar', '.MOV', '.heic', '.mov', '.ico', '.webp', '.wmv', '.mp4']
+
 
 def obter_data_criacao_arquivo(file_path):
     creation_time = os.path.getctime(file_path)
     return datetime.fromtimestamp(creation_time)
 
 
-def organizar_documentos(source_directory, destination_directory, allowed_extensions):
-    # Verifica se a pasta de origem existe
-    if not os.path.exists(source_directory):
-        print("A pasta de origem não existe.")
-        return
-
-    # Verifica se a pasta de destino existe. Se não, cria.
-    if not os.path.exists(destination_directory):
-        os.makedirs(destination_directory)
+def planejar_documentos(source_directory, destination_directory, allowed_extensions):
+    # Calcula o destino (ano/mês) de cada arquivo sem mover nada
+    moves = []
+    with os.scandir(source_directory) as entries:
+        for entry in entries:
+            file_name = entry.name
+            source_file_path = entry.path
 
-    # Percorre todos os arquivos na pasta de origem
-    for file_name in os.listdir(source_directory):
-        source_file_path = os.path.join(source_directory, file_name)
+            # Verifica se é um arquivo
+            if not entry.is_file():
+                print(f"O item '{file_name}' não é um arquivo.")
+                continue
 
-        # Verifica se é um arquivo
-        if os.path.isfile(source_file_path):
             try:
-                # Verifica a extensão do arquivo
-                file_extension = os.path.splitext(file_name)[1].lower()
-
                 # Verifica se a extensão está na lista de extensões permitidas
-                if file_extension in allowed_extensions:
+                if has_allowed_extension(file_name, allowed_extensions):
                     # Obtém a data de criação do arquivo
                     creation_date = obter_data_criacao_arquivo(source_file_path)
 
@@ -37,26 +35,51 @@ def organizar_documentos(source_directory, destination_directory, allowed_extens
                     year = str(creation_date.year)
                     month = str(creation_date.month).zfill(2)  # Zeros à esquerda para o mês
                     destination_path = os.path.join(destination_directory, year, month)
+                    moves.append((source_file_path, os.path.join(destination_path, file_name)))
+
+            except OSError:
+                print(f"Erro ao processar o arquivo '{file_name}'.")
 
-                    # Verifica se a pasta de destino existe. Se não, cria.
-                    if not os.path.exists(destination_path):
-                        os.makedirs(destination_path)
+    return moves
 
-                    # Move o arquivo para a pasta de destino
-                    destination_file_path = os.path.join(destination_path, file_name)
-                    shutil.move(source_file_path, destination_file_path)
 
-                    print(f"Arquivo '{file_name}' movido para '{destination_file_path}'.")
+def organizar_documentos(source_directory, destination_directory, allowed_extensions, journal_path=None, dry_run=False):
+    # Verifica se a pasta de origem existe
+    if not os.path.exists(source_directory):
+        print("A pasta de origem não existe.")
+        return
 
-            except OSError:
-                print(f"Erro ao processar o arquivo '{file_name}'.")
+    # Verifica se a pasta de destino existe. Se não, cria.
+    if not dry_run and not os.path.exists(destination_directory):
+        os.makedirs(destination_directory)
+
+    # Planeja todas as movimentações antes de mover qualquer arquivo; com journal, uma nova execução retoma o plano
+    run_planned_moves(
+        lambda: planejar_documentos(source_directory, destination_directory, allowed_extensions),
+        journal_path=journal_path,
+        dry_run=dry_run,
+        journal_parameters=journal_parameters('organize-docs', source_directory, destination_directory, allowed_extensions),
+    )
+
+
+def add_arguments(parser):
+    parser.add_argument('source_directory', type=str, help='Diretório com os documentos')
+    parser.add_argument('destination_directory', type=str, help='Diretório onde as pastas ano/mês serão criadas')
+    add_extension_arguments(parser, DEFAULT_ALLOWED_EXTENSIONS)
+    add_move_arguments(parser)
 
-        else:
-            print(f"O item '{file_name}' não é um arquivo.")
 
+def run(args):
+    organizar_documentos(
+        args.source_directory,
+        args.destination_directory,
+        normalize_extensions(args.extension or DEFAULT_ALLOWED_EXTENSIONS),
+        journal_path=args.journal,
+        dry_run=args.dry_run,
+    )
 
-source_directory = ""  # Insira o caminho do diretório de origem aqui
-destination_directory = ""  # Insira o caminho do diretório de destino aqui
-allowed_extensions =  ['.jpg', '.bmp', '.html', '.m4v', '.JPG', '.jpeg', '.png', '.gif', '.json', '.mp4', '.avi', '.tar', '.MOV', '.heic', '.mov', '.ico', '.webp', '.wmv', '.mp4']
 
-organizar_documentos(source_directory, destination_directory, allowed_extensions)
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Organiza documentos em pastas ano/mês pela data de criação.')
+    add_arguments(parser)
+    run(parser.parse_args())